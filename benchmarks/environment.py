@@ -0,0 +1,120 @@
+"""
+Offline app environment shared by the benchmarks
+
+Indexes the demo data into a throwaway Chroma directory with FakeEmbeddings
+and installs a ChatbotHandler backed by FakeChatModel, so the real pipeline
+(PII masking, profile store, vector search, prompt, session history) runs
+without Groq or Ollama.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from config.settings import settings
+from modules import auth, llm_handler, rag_retriever as rag_module
+from modules.llm_handler import ChatbotHandler
+from modules.profile_store import ProfileStore
+from modules.rag_retriever import (
+    DOC_TYPE_BUSINESS_INFO,
+    DOC_TYPE_CUSTOMER_PROFILE,
+    RAGRetriever,
+)
+from modules.response_cache import SemanticResponseCache
+from modules.user_store import UserDirectory
+
+BUSINESS_INFO_PATH = "./data/business_info"
+
+
+def add_arguments(parser) -> None:
+    """Options shared by every benchmark script"""
+    parser.add_argument(
+        "--llm-latency-ms",
+        type=float,
+        default=300,
+        help="fake LLM time to first token",
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=200,
+        help="fake LLM generation rate (0 = instant)",
+    )
+    parser.add_argument(
+        "--embedding-latency-ms",
+        type=float,
+        default=20,
+        help="fake Ollama round trip per embedding request",
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="keep the semantic response cache on (off by default so "
+        "repeated questions still reach the LLM)",
+    )
+
+
+def build_environment(args) -> tuple[ChatbotHandler, RAGRetriever]:
+    """
+    Build and install the retriever and chatbot singletons
+
+    Returns:
+        tuple: (chatbot, rag_retriever)
+    """
+    logging.getLogger().setLevel(logging.WARNING)
+    os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+    workdir = tempfile.mkdtemp(prefix="eva-bench-")
+    # Keep every on-disk store out of ./data so fake users and sessions
+    # never land in the repo's databases
+    settings.CHROMA_DB_PATH = os.path.join(workdir, "chroma_db")
+    settings.PROFILE_DB_PATH = os.path.join(workdir, "profiles.db")
+    settings.SESSION_DB_PATH = os.path.join(workdir, "sessions.db")
+    settings.USER_DB_PATH = os.path.join(workdir, "users.db")
+    if settings.EMBEDDING_CACHE_PATH:
+        settings.EMBEDDING_CACHE_PATH = os.path.join(workdir, "embeddings.db")
+
+    embeddings = FakeEmbeddings(latency=args.embedding_latency_ms / 1000)
+    retriever = RAGRetriever(embeddings=embeddings)
+    retriever.profile_store = ProfileStore(settings.PROFILE_DB_PATH)
+    retriever.index_documents(
+        settings.CUSTOMER_DATA_PATH, doc_type=DOC_TYPE_CUSTOMER_PROFILE
+    )
+    retriever.profile_store.build_from_directory(settings.CUSTOMER_DATA_PATH)
+    retriever.index_documents(BUSINESS_INFO_PATH, doc_type=DOC_TYPE_BUSINESS_INFO)
+
+    chatbot = ChatbotHandler(
+        chat_model=FakeChatModel(
+            latency=args.llm_latency_ms / 1000,
+            tokens_per_second=args.tokens_per_second,
+        )
+    )
+    if not args.response_cache:
+        chatbot.response_cache = SemanticResponseCache(maxsize=0)
+
+    # The directory's default path was bound at import time, so install one
+    auth._user_directory.set(UserDirectory(db_path=settings.USER_DB_PATH))
+    rag_module._rag_retriever.set(retriever)
+    llm_handler._chatbot.set(chatbot)
+    return chatbot, retriever
+
+
+def percentiles(timings: list[float]) -> dict:
+    """mean/p50/p95/p99 in milliseconds"""
+    if not timings:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    ordered = sorted(timings)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+    return {
+        "mean": sum(ordered) / len(ordered) * 1000,
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+    }
@@ -0,0 +1,155 @@
+"""
+End-to-end load generator for the FastAPI app, offline
+
+Drives /chat (or /chat/stream) in-process through httpx's ASGI transport
+with fake Groq/Ollama stand-ins and reports latency percentiles,
+throughput and the per-stage breakdown from the Server-Timing header.
+Run: python benchmarks/load_test.py --requests 500 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+from benchmarks.environment import add_arguments, build_environment, percentiles
+
+QUESTIONS = [
+    "What are your hours on Sunday?",
+    "Do you have oat milk?",
+    "What's in my order history?",
+    "Can I use my loyalty points today?",
+    "thanks!",
+]
+
+USERNAMES = ["john", "sarah", "demo"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200, help="total requests")
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="requests in flight at once"
+    )
+    parser.add_argument(
+        "--users",
+        type=int,
+        default=50,
+        help="distinct usernames (beyond the demo users they are new customers)",
+    )
+    parser.add_argument(
+        "--stream", action="store_true", help="use /chat/stream instead of /chat"
+    )
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def parse_server_timing(header: str) -> dict[str, float]:
+    """'stage;dur=1.2, ...' -> {stage: milliseconds}"""
+    stages = {}
+    for part in header.split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if duration:
+            stages[name] = float(duration)
+    return stages
+
+
+async def run_load(app, args) -> dict:
+    usernames = (USERNAMES + [f"user{i}" for i in range(args.users)])[: args.users]
+    path = "/chat/stream" if args.stream else "/chat"
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = defaultdict(int)
+    stages: dict[str, list[float]] = defaultdict(list)
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            payload = {
+                "message": QUESTIONS[i % len(QUESTIONS)],
+                "username": usernames[i % len(usernames)],
+            }
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                await response.aread()  # includes the whole stream
+                statuses[response.status_code] += 1
+                for stage, ms in parse_server_timing(
+                    response.headers.get("server-timing", "")
+                ).items():
+                    stages[stage].append(ms / 1000)
+            except httpx.HTTPError:
+                statuses[0] += 1
+            latencies.append(time.perf_counter() - started)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=120
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed": elapsed,
+        "latency": percentiles(latencies),
+        "statuses": dict(statuses),
+        "stages": {stage: percentiles(values) for stage, values in stages.items()},
+    }
+
+
+def main():
+    """Print latency percentiles, req/s and the stage breakdown"""
+    args = parse_args()
+    build_environment(args)
+
+    # Imported after the fakes are installed; ASGITransport does not run the
+    # lifespan, so the warm-up never replaces them
+    from main import app
+
+    result = asyncio.run(run_load(app, args))
+    latency = result["latency"]
+
+    print("=" * 70)
+    print(
+        f"{args.requests} requests to {'/chat/stream' if args.stream else '/chat'}, "
+        f"concurrency {args.concurrency}, {args.users} users"
+    )
+    print(
+        f"fake LLM: {args.llm_latency_ms:.0f}ms + {args.tokens_per_second:.0f} tok/s, "
+        f"fake embeddings: {args.embedding_latency_ms:.0f}ms"
+    )
+    print("-" * 70)
+    print(f"Throughput: {args.requests / result['elapsed']:.1f} req/s")
+    print(
+        f"Latency:    p50 {latency['p50']:.1f}ms  p95 {latency['p95']:.1f}ms  "
+        f"p99 {latency['p99']:.1f}ms  (mean {latency['mean']:.1f}ms)"
+    )
+    print(f"Status codes: {result['statuses']}")
+    print("-" * 70)
+    print(f"{'stage':<20}{'mean':>12}{'p50':>12}{'p95':>12}{'p99':>12}")
+    for stage, p in sorted(result["stages"].items(), key=lambda s: -s[1]["mean"]):
+        print(
+            f"{stage:<20}{p['mean']:>10.2f}ms{p['p50']:>10.2f}ms"
+            f"{p['p95']:>10.2f}ms{p['p99']:>10.2f}ms"
+        )
+    print("=" * 70)
+
+    if any(code != 200 for code in result["statuses"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
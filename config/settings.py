@@ -14,15 +14,95 @@ class Settings:
 
     # Model Configuration
     MODEL_NAME: str = os.getenv("MODEL_NAME", "openai/gpt-oss-120b")
-    MEMORY_LENGTH: int = int(os.getenv("MEMORY_LENGTH", "10"))
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "llama3.1")
+    MEMORY_LENGTH: int = int(os.getenv("MEMORY_LENGTH", "10"))  # turns kept verbatim
+    MEMORY_MAX_TOKENS: int = int(os.getenv("MEMORY_MAX_TOKENS", "2000"))
+    MEMORY_SUMMARIZE: bool = os.getenv("MEMORY_SUMMARIZE", "False").lower() == "true"
+    # Turns that must fall outside the window before they are summarized
+    MEMORY_COMPACT_THRESHOLD: int = int(os.getenv("MEMORY_COMPACT_THRESHOLD", "4"))
+    # Keep the system prompt identical across a session's turns so Groq can
+    # reuse its cached prompt prefix; per-turn context goes next to the question
+    PROMPT_PREFIX_CACHING: bool = (
+        os.getenv("PROMPT_PREFIX_CACHING", "True").lower() == "true"
+    )
 
     # Limits
     MAX_MESSAGE_LENGTH: int = 2000
     REQUEST_TIMEOUT: int = 30
 
+    # Session store
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "memory")  # memory|sqlite|redis
+    SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "./data/sessions.db")
+    SESSION_REDIS_URL: str = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+    SESSION_FLUSH_INTERVAL_MS: int = int(os.getenv("SESSION_FLUSH_INTERVAL_MS", "50"))
+    SESSION_FLUSH_BATCH_SIZE: int = int(os.getenv("SESSION_FLUSH_BATCH_SIZE", "256"))
+    SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_TTL_SECONDS: int = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    SESSION_MAX_MEMORY_MB: int = int(os.getenv("SESSION_MAX_MEMORY_MB", "256"))
+
+    # Indexing
+    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "800"))
+    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "100"))
+    INDEX_BATCH_SIZE: int = int(os.getenv("INDEX_BATCH_SIZE", "64"))
+    INDEX_CONCURRENCY: int = int(os.getenv("INDEX_CONCURRENCY", "4"))
+
+    # Caches
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    EMBEDDING_CACHE_PATH: str = os.getenv(
+        "EMBEDDING_CACHE_PATH", ""
+    )  # "" = memory only
+    # Concurrent query embeddings are merged into one request (1 = off)
+    EMBEDDING_BATCH_MAX_SIZE: int = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "16"))
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = float(
+        os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")
+    )
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))  # 0 = off
+    RESPONSE_CACHE_TTL_SECONDS: int = int(
+        os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")
+    )
+    RESPONSE_CACHE_THRESHOLD: float = float(
+        os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95")
+    )  # min cosine similarity
+
+    # Concurrency
+    PII_MAX_WORKERS: int = int(os.getenv("PII_MAX_WORKERS", "4"))
+    # Admission control for Groq calls: the concurrency limit adapts
+    # (AIMD) between MIN and MAX based on latency and 429s
+    LLM_MIN_CONCURRENCY: int = int(os.getenv("LLM_MIN_CONCURRENCY", "2"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_INITIAL_CONCURRENCY: int = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+    LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "64"))
+    LLM_MAX_QUEUE_WAIT_SECONDS: float = float(
+        os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "10")
+    )  # longer expected waits get a 503 with Retry-After
+    LLM_LATENCY_TARGET_SECONDS: float = float(
+        os.getenv("LLM_LATENCY_TARGET_SECONDS", "5")
+    )
+
+    # PII masking
+    PII_STRICT_MODE: bool = (
+        os.getenv("PII_STRICT_MODE", "False").lower() == "true"
+    )  # always run full analysis
+    # spaCy model behind PERSON detection (Presidio's default is en_core_web_lg)
+    PII_SPACY_MODEL: str = os.getenv("PII_SPACY_MODEL", "en_core_web_sm")
+    PII_BATCH_SIZE: int = int(os.getenv("PII_BATCH_SIZE", "32"))  # mask_many
+    PII_N_PROCESS: int = int(os.getenv("PII_N_PROCESS", "1"))  # mask_many
+    # Worker processes for mask_pii/amask_pii (0 = analyze in the API process)
+    PII_PROCESS_WORKERS: int = int(os.getenv("PII_PROCESS_WORKERS", "0"))
+    PII_PROCESS_QUEUE_SIZE: int = int(
+        os.getenv("PII_PROCESS_QUEUE_SIZE", "32")
+    )  # texts waiting beyond one per worker
+    PII_PROCESS_QUEUE_TIMEOUT: float = float(
+        os.getenv("PII_PROCESS_QUEUE_TIMEOUT", "2.0")
+    )  # then analyze in-process instead
+
     # Paths
     CHROMA_DB_PATH: str = "./data/chroma_db"
     CUSTOMER_DATA_PATH: str = "./data/customer_profiles"
+    PROFILE_DB_PATH: str = os.getenv("PROFILE_DB_PATH", "./data/profiles.db")
+    PROFILE_CACHE_SIZE: int = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+    USER_DB_PATH: str = os.getenv("USER_DB_PATH", "./data/users.db")
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
 
     # Debug
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
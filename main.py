@@ -1,17 +1,43 @@
+import asyncio
+import json
 import logging
 import os
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 
 from config.settings import settings
-from models.schemas import ChatRequest, ChatResponse, HealthResponse, UserListResponse
-from modules.auth import get_or_create_user, list_users
-from modules.llm_handler import ChatbotError, chatbot
+from models.schemas import (
+    ChatRequest,
+    ChatResponse,
+    HealthResponse,
+    UserInfo,
+    UserListResponse,
+)
+from modules.admission import AdmissionRejected
+from modules.auth import (
+    get_or_create_user,
+    get_user,
+    get_username,
+    list_users,
+    user_count,
+)
+from modules.lazy import component_status, warm_up
+from modules.llm_handler import ChatbotError, aget_chatbot, get_chatbot
+from modules.pii_masker import get_pii_masker
+from modules.rag_retriever import get_rag_retriever
+from modules.timing import metrics, server_timing, start_trace
 
 # Configure logging
 logging.basicConfig(
@@ -19,11 +45,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize RAG globally
-from modules import llm_handler
-from modules.rag_retriever import rag_retriever
 
-llm_handler.rag_retriever = rag_retriever
+def _ready(component: str) -> bool:
+    return component_status()[component]["status"] == "ready"
+
+
+async def warm_up_components():
+    """Load the spaCy model, Chroma and the LLM client concurrently"""
+    await warm_up()
 
 
 # ========================================
@@ -38,10 +67,24 @@ async def lifespan(app: FastAPI):
     logger.info("Demo Users: john, sarah, demo")
     logger.info("=" * 60)
 
+    # Heavy components load in the background so the port binds immediately;
+    # /health reports per-component readiness meanwhile
+    app.state.warm_up = asyncio.create_task(warm_up_components())
+
     yield
 
-    # Shutdown (if needed)
+    # Shutdown: stop a warm-up that is still running, then persist any
+    # buffered session writes
     logger.info("Shutting down...")
+    app.state.warm_up.cancel()
+    try:
+        await app.state.warm_up
+    except asyncio.CancelledError:
+        pass
+    if _ready("chatbot"):
+        get_chatbot().store.close()
+    if _ready("pii_masker"):
+        get_pii_masker().close()
 
 
 app = FastAPI(
@@ -59,6 +102,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def request_timing(request: Request, call_next):
+    """Per-request latency breakdown: histograms + Server-Timing header"""
+    spans = start_trace()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.observe("eva_request_duration_seconds", elapsed, route=path)
+
+    # Streaming responses return before the LLM runs, so only the
+    # pre-LLM stages appear in their header
+    spans.append(("total", elapsed))
+    response.headers["Server-Timing"] = server_timing(spans)
+    if settings.DEBUG:
+        breakdown = ", ".join(f"{stage}={t * 1000:.1f}ms" for stage, t in spans)
+        logger.info(f"⏱️ {request.method} {path}: {breakdown}")
+    return response
+
+
 # Serve static files
 if os.path.exists("static"):
     app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -105,18 +171,29 @@ async def serve_frontend():
 # ========================================
 @app.get("/health", response_model=HealthResponse)
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (status is "starting" until warm-up finishes)"""
     try:
+        rag_retriever = get_rag_retriever() if _ready("rag_retriever") else None
         rag_enabled = (
             rag_retriever is not None and rag_retriever.vectorstore is not None
         )
 
+        components = component_status()
+        states = {component["status"] for component in components.values()}
+        if states == {"ready"}:
+            overall = "healthy"
+        elif "failed" in states:
+            overall = "degraded"
+        else:
+            overall = "starting"
+
         return {
-            "status": "healthy",
+            "status": overall,
             "model": settings.MODEL_NAME,
             "langchain_version": "0.3+",
             "rag_enabled": rag_enabled,
             "pii_protection": True,
+            "components": components,
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -125,20 +202,31 @@ def health_check():
         )
 
 
+def _overloaded(e: AdmissionRejected) -> HTTPException:
+    """503 telling the client when to retry"""
+    logger.warning(f"⚠️  Chat rejected by admission control: {str(e)}")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"EVA is busy right now, please retry in {e.retry_after}s",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest):
     """
     Simple chat endpoint - just provide username and message
     No authentication needed for demo!
     """
     try:
         # Get or create user
-        user = get_or_create_user(request.username)
+        user = await asyncio.to_thread(get_or_create_user, request.username)
         customer_id = user["customer_id"]
 
         logger.info(f"Chat from {request.username} ({customer_id})")
 
-        result = chatbot.get_response(
+        chatbot = await aget_chatbot()
+        result = await chatbot.aget_response(
             user_message=request.message, customer_id=customer_id, session_id="default"
         )
 
@@ -149,8 +237,13 @@ def chat_endpoint(request: ChatRequest):
             "timestamp": datetime.now().isoformat(),
             "pii_masked": result["pii_masked"],
             "context_retrieved": result["context_retrieved"],
+            "cached": result["cached"],
+            "token_usage": result["token_usage"],
         }
 
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+
     except ChatbotError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
@@ -164,11 +257,106 @@ def chat_endpoint(request: ChatRequest):
         )
 
 
+def _sse(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    Emits a `meta` event, then `token` events as EVA types, then `done`
+    """
+    user = await asyncio.to_thread(get_or_create_user, request.username)
+    customer_id = user["customer_id"]
+
+    logger.info(f"Streaming chat from {request.username} ({customer_id})")
+
+    chatbot = await aget_chatbot()
+    events = chatbot.astream_response(
+        user_message=request.message,
+        customer_id=customer_id,
+        session_id="default",
+    )
+
+    # Pull the first event before responding, so a saturated LLM gets a
+    # real 503 rather than an error inside a 200 stream
+    try:
+        first = await anext(events)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except Exception as e:
+        first = e  # reported as an SSE error below
+
+    def to_sse(event: dict) -> str:
+        payload = {k: v for k, v in event.items() if k != "type"}
+        if event["type"] == "meta":
+            payload.update(
+                username=request.username,
+                customer_id=customer_id,
+                timestamp=datetime.now().isoformat(),
+            )
+        return _sse(event["type"], payload)
+
+    async def event_stream():
+        try:
+            if isinstance(first, Exception):
+                raise first
+
+            yield to_sse(first)
+            async for event in events:
+                yield to_sse(event)
+
+        except AdmissionRejected as e:  # rate limited mid-stream
+            logger.warning(f"⚠️  Stream cut short by rate limiting: {str(e)}")
+            detail = f"EVA is busy right now, please retry in {e.retry_after}s"
+            yield _sse("error", {"detail": detail, "retry_after": e.retry_after})
+
+        except ChatbotError as e:
+            yield _sse("error", {"detail": str(e)})
+
+        except Exception as e:
+            logger.error(f"Unexpected streaming error: {str(e)}")
+            yield _sse("error", {"detail": "Failed to process chat request"})
+
+        finally:
+            # Frees the LLM slot promptly if the client disconnects
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/users", response_model=UserListResponse)
-def list_all_users():
-    """List all users (for demo)"""
-    users = list_users()
-    return {"users": users, "count": len(users)}
+def list_all_users(
+    prefix: str = "",
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[str] = None,
+):
+    """List users a page at a time, optionally filtered by username prefix"""
+    users = list_users(prefix=prefix, limit=limit, after=after)
+    return {
+        "users": users,
+        "count": len(users),
+        "total": user_count(),
+        # A full page may have more behind it; an empty cursor means done
+        "next_cursor": users[-1]["username"] if len(users) == limit else None,
+    }
+
+
+@app.get("/users/{username}", response_model=UserInfo)
+def get_user_info(username: str):
+    """Look up one user without creating it"""
+    user = get_user(username)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    return user
 
 
 @app.delete("/session/{username}")
@@ -179,7 +367,7 @@ def clear_session(username: str):
         customer_id = user["customer_id"]
         full_session_id = f"{customer_id}:default"
 
-        success = chatbot.clear_session(full_session_id)
+        get_chatbot().clear_session(full_session_id)
         return {
             "message": f"Session cleared for {username}",
             "customer_id": customer_id,
@@ -200,10 +388,10 @@ def get_chat_history(username: str):
         customer_id = user["customer_id"]
         full_session_id = f"{customer_id}:default"
 
-        if full_session_id not in chatbot.store:
+        history = get_chatbot().store.get(full_session_id)
+        if history is None:
             return {"messages": [], "count": 0}
 
-        history = chatbot.store[full_session_id]
         messages = []
 
         for msg in history.messages:
@@ -227,35 +415,49 @@ def get_chat_history(username: str):
 @app.get("/analytics")
 def get_analytics():
     """Analytics dashboard data"""
-    from modules.auth import users_db
-
-    # Count active sessions
-    active_sessions = len(chatbot.store)
+    chatbot = get_chatbot()
+    rag_retriever = get_rag_retriever() if _ready("rag_retriever") else None
 
-    # Count messages per user
+    # Counts are kept by the session backend as messages are written (shared
+    # by every worker on sqlite/redis); no history is read
+    counts = chatbot.store.message_counts()
     message_counts = {}
-    for session_id, history in chatbot.store.items():
-        customer_id = session_id.split(":")[0]
-        username = next(
-            (u for u, d in users_db.items() if d["customer_id"] == customer_id),
-            "Unknown",
-        )
-        message_counts[username] = len(history.messages)
-
-    # Total messages
-    total_messages = sum(message_counts.values())
+    for customer_id, n in counts["messages_per_customer"].items():
+        username = get_username(customer_id) or "Unknown"
+        message_counts[username] = message_counts.get(username, 0) + n
+    store_stats = chatbot.store.stats()
 
     return {
-        "total_users": len(users_db),
-        "active_conversations": active_sessions,
-        "total_messages": total_messages,
+        "total_users": user_count(),
+        "active_conversations": store_stats["active_sessions"],
+        "total_messages": counts["total_messages"],
         "messages_per_user": message_counts,
+        "session_store": store_stats,
         "rag_enabled": rag_retriever is not None
         and rag_retriever.vectorstore is not None,
+        "embedding_cache": (
+            rag_retriever.embeddings.stats()
+            if rag_retriever is not None and rag_retriever.embeddings is not None
+            else None
+        ),
+        "embedding_batching": (
+            rag_retriever.embedding_batcher.stats()
+            if rag_retriever is not None and rag_retriever.embedding_batcher is not None
+            else None
+        ),
+        "response_cache": chatbot.response_cache.stats(),
+        "llm_admission": chatbot.admission.stats(),
+        "pii_prescreen": get_pii_masker().stats() if _ready("pii_masker") else None,
         "timestamp": datetime.now().isoformat(),
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Latency histograms in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
 
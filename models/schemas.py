@@ -21,6 +21,8 @@ class ChatResponse(BaseModel):
     timestamp: str
     pii_masked: bool = False
     context_retrieved: bool = False
+    cached: bool = False
+    token_usage: Optional[dict] = None
 
 
 class HealthResponse(BaseModel):
@@ -29,8 +31,17 @@ class HealthResponse(BaseModel):
     langchain_version: str
     rag_enabled: bool
     pii_protection: bool
+    components: dict = {}
+
+
+class UserInfo(BaseModel):
+    username: str
+    customer_id: str
+    name: str
 
 
 class UserListResponse(BaseModel):
-    users: dict
-    count: int
+    users: list[UserInfo]
+    count: int  # users on this page
+    total: int  # users in the directory
+    next_cursor: Optional[str] = None  # pass as `after` for the next page
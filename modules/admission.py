@@ -0,0 +1,267 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+from config.settings import settings
+from modules.timing import metrics
+from modules.waiters import Waiter, await_grant
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """The LLM is saturated; the caller should retry after `retry_after` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limited(e: Exception) -> bool:
+    """True for provider 429s (groq.RateLimitError or anything with status 429)"""
+    return (
+        getattr(e, "status_code", None) == 429 or type(e).__name__ == "RateLimitError"
+    )
+
+
+def provider_retry_after(e: Exception) -> Optional[int]:
+    """Seconds from a provider error's Retry-After header, if it sent one"""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return max(1, math.ceil(float(headers.get("retry-after"))))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdmissionController:
+    """
+    Adaptive concurrency limit for upstream LLM calls
+
+    At most `limit` calls run at once; the rest wait in one FIFO queue shared
+    by threads and coroutines. A caller is turned away immediately when the
+    queue is full or its expected wait (queue position x recent call latency
+    / limit) exceeds `max_queue_wait`, and after `max_queue_wait` otherwise.
+
+    The limit follows AIMD: +1 per limit's worth of fast calls, x0.5 on a
+    429 and x0.9 when a call exceeds `latency_target` (at most one decrease
+    per round trip, so a burst of errors does not collapse it).
+    """
+
+    def __init__(
+        self,
+        min_limit: int = settings.LLM_MIN_CONCURRENCY,
+        max_limit: int = settings.LLM_MAX_CONCURRENCY,
+        initial_limit: int = settings.LLM_INITIAL_CONCURRENCY,
+        max_queue: int = settings.LLM_MAX_QUEUE,
+        max_queue_wait: float = settings.LLM_MAX_QUEUE_WAIT_SECONDS,
+        latency_target: float = settings.LLM_LATENCY_TARGET_SECONDS,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.latency_target = latency_target
+
+        self._lock = threading.Lock()
+        self._waiters: deque[Waiter] = deque()
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # EWMA of call durations
+        self._last_decrease = 0.0
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rate_limited = 0
+        self.decreases = 0
+
+        metrics.gauge("eva_llm_queue_depth", lambda: len(self._waiters))
+        metrics.gauge("eva_llm_in_flight", lambda: self.in_flight)
+        metrics.gauge("eva_llm_concurrency_limit", lambda: int(self.limit))
+
+    # ----- admission (call with self._lock held) -----
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def _expected_wait(self, position: int) -> float:
+        return position * (self.latency or 0.0) / max(1, int(self.limit))
+
+    def _retry_after(self, expected_wait: float) -> int:
+        return max(1, math.ceil(expected_wait or self.latency or 1.0))
+
+    def _admit_or_check(self) -> bool:
+        """Admit now (True), allow queueing (False) or raise AdmissionRejected"""
+        if not self._waiters and self._has_capacity():
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(
+                "LLM queue is full", self._retry_after(self._expected_wait(1))
+            )
+
+        expected = self._expected_wait(len(self._waiters) + 1)
+        if expected > self.max_queue_wait:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"Expected LLM queue wait {expected:.1f}s exceeds "
+                f"{self.max_queue_wait:.0f}s",
+                self._retry_after(expected),
+            )
+        return False
+
+    def _grant_waiters(self) -> None:
+        while self._waiters and self._has_capacity():
+            if not self._waiters.popleft().grant():
+                continue
+            self.in_flight += 1
+            self.admitted += 1
+
+    def _timed_out(self, waiter: Waiter) -> AdmissionRejected:
+        self._waiters.remove(waiter)
+        self.timeouts += 1
+        self.rejected += 1
+        return AdmissionRejected(
+            f"No LLM capacity within {self.max_queue_wait:.0f}s",
+            self._retry_after(self._expected_wait(len(self._waiters) + 1)),
+        )
+
+    @staticmethod
+    def _record_wait(waiter: Optional[Waiter]) -> None:
+        waited = time.perf_counter() - waiter.enqueued_at if waiter else 0.0
+        metrics.observe("eva_llm_queue_wait_seconds", waited)
+
+    # ----- public API -----
+
+    def acquire(self) -> None:
+        """Block until a slot is free; raises AdmissionRejected"""
+        with self._lock:
+            if self._admit_or_check():
+                self._record_wait(None)
+                return
+            waiter = Waiter.for_thread()
+            self._waiters.append(waiter)
+
+        waiter.event.wait(self.max_queue_wait)
+        with self._lock:
+            if not waiter.granted:
+                raise self._timed_out(waiter)
+        self._record_wait(waiter)
+
+    async def aacquire(self) -> None:
+        """Async variant of acquire; waiting does not block the event loop"""
+        with self._lock:
+            if self._admit_or_check():
+                self._record_wait(None)
+                return
+            waiter = Waiter.for_coroutine()
+            self._waiters.append(waiter)
+
+        await await_grant(
+            waiter, self.max_queue_wait, self._lock, self._waiters, self._give_back
+        )
+        with self._lock:
+            if not waiter.granted:
+                raise self._timed_out(waiter)
+        self._record_wait(waiter)
+
+    def _give_back(self) -> None:
+        # A slot granted to a cancelled waiter goes to the next one
+        self.in_flight -= 1
+        self._grant_waiters()
+
+    def release(self, latency: float, rate_limited: bool = False) -> None:
+        """Free a slot and adapt the limit to how the call went"""
+        with self._lock:
+            self.in_flight -= 1
+            self._adapt(latency, rate_limited)
+            self._grant_waiters()
+
+    def _adapt(self, latency: float, rate_limited: bool) -> None:
+        self.latency = (
+            latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        )
+
+        if rate_limited or latency > self.latency_target:
+            now = time.monotonic()
+            if now - self._last_decrease < self.latency:
+                return
+            factor = 0.5 if rate_limited else 0.9
+            self.limit = max(self.min_limit, self.limit * factor)
+            self._last_decrease = now
+            self.decreases += 1
+            logger.warning(
+                f"LLM concurrency limit lowered to {int(self.limit)} "
+                f"({'429' if rate_limited else f'{latency:.1f}s call'})"
+            )
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold a slot for the duration of one LLM call"""
+        self.acquire()
+        started = time.perf_counter()
+        rate_limited = False
+        try:
+            yield
+        except Exception as e:
+            rate_limited = is_rate_limited(e)
+            raise
+        finally:
+            self._finish(time.perf_counter() - started, rate_limited)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """Async variant of slot"""
+        await self.aacquire()
+        started = time.perf_counter()
+        rate_limited = False
+        try:
+            yield
+        except Exception as e:
+            rate_limited = is_rate_limited(e)
+            raise
+        finally:
+            self._finish(time.perf_counter() - started, rate_limited)
+
+    def rate_limit_rejection(self, e: Exception) -> AdmissionRejected:
+        """
+        AdmissionRejected for a provider 429, so the client gets a 503 with
+        Retry-After (the provider's, else our own estimate) instead of an error
+        """
+        retry_after = provider_retry_after(e)
+        if retry_after is None:
+            with self._lock:
+                retry_after = self._retry_after(self._expected_wait(1))
+        return AdmissionRejected(f"LLM provider rate limited: {str(e)}", retry_after)
+
+    def _finish(self, latency: float, rate_limited: bool) -> None:
+        if rate_limited:
+            with self._lock:
+                self.rate_limited += 1
+        self.release(latency, rate_limited)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "queue_depth": len(self._waiters),
+                "avg_latency_s": (
+                    round(self.latency, 3) if self.latency is not None else None
+                ),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "rate_limited": self.rate_limited,
+                "limit_decreases": self.decreases,
+            }
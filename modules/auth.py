@@ -1,28 +1,38 @@
 import logging
 from typing import Optional
 
+from modules.lazy import LazySingleton
+from modules.user_store import UserDirectory
+
 logger = logging.getLogger(__name__)
 
-# Simple in-memory user database (username -> customer_id)
-users_db = {
-    "john": {"customer_id": "CUST-001", "name": "John Doe"},
-    "sarah": {"customer_id": "CUST-002", "name": "Sarah Johnson"},
-    "demo": {"customer_id": "CUST-999", "name": "Demo User"},
-}
+# Persistent user directory (username <-> customer_id), opened on first use
+_user_directory = LazySingleton("user_directory", UserDirectory)
+
+
+def get_user_directory() -> UserDirectory:
+    return _user_directory.get()
 
 
 def get_or_create_user(username: str) -> dict:
     """Get existing user or create new one"""
-    if username in users_db:
-        return users_db[username]
+    return get_user_directory().get_or_create(username)
+
+
+def get_user(username: str) -> Optional[dict]:
+    """Existing user or None (never creates one)"""
+    return get_user_directory().get(username)
+
+
+def get_username(customer_id: str) -> Optional[str]:
+    """Username owning a customer_id (indexed, cached)"""
+    return get_user_directory().get_username(customer_id)
+
 
-    # Auto-create new user
-    customer_id = f"CUST-{len(users_db) + 1:03d}"
-    users_db[username] = {"customer_id": customer_id, "name": username.capitalize()}
-    logger.info(f"Created new user: {username} -> {customer_id}")
-    return users_db[username]
+def user_count() -> int:
+    return get_user_directory().count()
 
 
-def list_users():
-    """List all users (for demo)"""
-    return users_db
+def list_users(prefix: str = "", limit: int = 50, after: Optional[str] = None):
+    """One page of users, optionally filtered by username prefix"""
+    return get_user_directory().page(prefix=prefix, limit=limit, after=after)
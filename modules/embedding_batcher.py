@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from modules.timing import metrics
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _Batch:
+    """Queries collected for one upstream request"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.items: list[tuple[str, object, float]] = []  # text, future, queued at
+        self.full = asyncio.Event() if loop is not None else threading.Event()
+
+
+class EmbeddingCoalescer(Embeddings):
+    """
+    Merges concurrent embed_query calls into one embed_documents request
+
+    While an upstream request is in flight, new queries wait up to
+    `max_wait` seconds (or until `max_batch` have gathered) and are then sent
+    together; each caller gets its own vector back. An idle coalescer sends
+    a lone query straight away, so a quiet server pays no extra latency.
+    Sync (threads) and async callers are batched separately.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_wait: float = settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000,
+        max_batch: int = settings.EMBEDDING_BATCH_MAX_SIZE,
+    ):
+        self.embeddings = embeddings
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._open: Optional[_Batch] = None  # sync callers
+        self._aopen: Optional[_Batch] = None  # async callers
+        self._tasks: set = set()
+        self.in_flight = 0
+
+        self.batches = 0
+        self.queries = 0
+        self.largest_batch = 0
+        self.total_wait = 0.0
+
+    def _join(self, text: str, future, loop=None) -> tuple[_Batch, bool]:
+        """Add a query to the open batch; returns (batch, opened_it)"""
+        with self._lock:
+            batch = self._aopen if loop is not None else self._open
+            opened = batch is None or batch.loop is not loop
+            if opened:
+                batch = _Batch(loop)
+                if loop is not None:
+                    self._aopen = batch
+                else:
+                    self._open = batch
+            batch.items.append((text, future, time.perf_counter()))
+
+            # A full batch is closed so the next query opens a new one
+            if len(batch.items) >= self.max_batch:
+                self._close(batch)
+                batch.full.set()
+            # Nothing upstream to overlap with: send now rather than wait
+            elif opened and self.in_flight == 0:
+                batch.full.set()
+            return batch, opened
+
+    def _close(self, batch: _Batch) -> None:
+        if self._open is batch:
+            self._open = None
+        if self._aopen is batch:
+            self._aopen = None
+
+    def _start(self, batch: _Batch) -> list[str]:
+        """Close the batch, record its metrics and count it in flight"""
+        with self._lock:
+            self._close(batch)
+            self.in_flight += 1
+            started = time.perf_counter()
+            self.batches += 1
+            self.queries += len(batch.items)
+            self.largest_batch = max(self.largest_batch, len(batch.items))
+            for _, _, queued_at in batch.items:
+                self.total_wait += started - queued_at
+
+        metrics.observe(
+            "eva_embedding_batch_size", len(batch.items), buckets=BATCH_SIZE_BUCKETS
+        )
+        for _, _, queued_at in batch.items:
+            metrics.observe("eva_embedding_queue_wait_seconds", started - queued_at)
+        return [text for text, _, _ in batch.items]
+
+    def _finish(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _flush(self, batch: _Batch) -> None:
+        batch.full.wait(self.max_wait)
+        texts = self._start(batch)
+        try:
+            vectors = self.embeddings.embed_documents(texts)
+        except Exception as e:
+            for _, future, _ in batch.items:
+                future.set_exception(e)
+            return
+        finally:
+            self._finish()
+        for (_, future, _), vector in zip(batch.items, vectors):
+            future.set_result(vector)
+
+    async def _aflush(self, batch: _Batch) -> None:
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        texts = self._start(batch)
+        try:
+            vectors = await self.embeddings.aembed_documents(texts)
+        except Exception as e:
+            for _, future, _ in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._finish()
+        for (_, future, _), vector in zip(batch.items, vectors):
+            if not future.done():  # caller may have been cancelled
+                future.set_result(vector)
+
+    def embed_query(self, text: str) -> list[float]:
+        future: Future = Future()
+        batch, opened = self._join(text, future)
+        # The thread that opened the batch sends it
+        if opened:
+            self._flush(batch)
+        return future.result()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch, opened = self._join(text, future, loop)
+        # A task (not the caller) sends the batch, so cancelling the caller
+        # that opened it cannot strand the others
+        if opened:
+            task = loop.create_task(self._aflush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await future
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self.batches,
+                "queries": self.queries,
+                "avg_batch_size": (
+                    round(self.queries / self.batches, 2) if self.batches else 0.0
+                ),
+                "largest_batch": self.largest_batch,
+                "avg_wait_ms": (
+                    round(self.total_wait / self.queries * 1000, 3)
+                    if self.queries
+                    else 0.0
+                ),
+                "requests_saved": self.queries - self.batches,
+            }
@@ -0,0 +1,137 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+from modules.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query: case, whitespace and trailing punctuation folded"""
+    return re.sub(r"\s+", " ", text.lower()).strip(" ?!.")
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that caches query vectors
+
+    Lookups go to an in-memory LRU first and then, if EMBEDDING_CACHE_PATH
+    is set, to an on-disk SQLite layer keyed by model name, so repeated
+    questions skip the Ollama round trip even after a restart. Document
+    embeddings (indexing) are passed straight through.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        maxsize: int = settings.EMBEDDING_CACHE_SIZE,
+        disk_path: Optional[str] = settings.EMBEDDING_CACHE_PATH,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = LRUCache(maxsize)
+        self.disk_path = disk_path or None
+        self._local = threading.local()
+        self.disk_hits = 0
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        if not self.disk_path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.disk_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.disk_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, query))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _lookup(self, key: str) -> Optional[list[float]]:
+        vector = self.cache.get(key)
+        if vector is not None:
+            return vector
+
+        conn = self._disk()
+        if conn is None:
+            return None
+
+        try:
+            row = conn.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+                (self.model_name, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache read failed: {str(e)}")
+            return None
+
+        if row is None:
+            return None
+
+        vector = array("f", row[0]).tolist()
+        self.disk_hits += 1
+        self.cache.put(key, vector)
+        return vector
+
+    def _store(self, key: str, vector: list[float]) -> None:
+        self.cache.put(key, vector)
+
+        conn = self._disk()
+        if conn is None:
+            return
+
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?)",
+                    (self.model_name, key, array("f", vector).tobytes()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding disk cache write failed: {str(e)}")
+
+    def embed_query(self, text: str) -> list[float]:
+        key = normalize_query(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = normalize_query(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._store(key, vector)
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> dict:
+        """Hit/miss counters (memory misses that hit disk count as disk_hits)"""
+        stats = self.cache.stats()
+        return {
+            "model": self.model_name,
+            "memory_hits": stats["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": stats["misses"] - self.disk_hits,
+            "size": stats["size"],
+            "maxsize": stats["maxsize"],
+            "disk_enabled": self.disk_path is not None,
+        }
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IndexManifest:
+    """
+    Record of what is in the vectorstore: file path -> content hash -> chunk IDs
+
+    Lets index_documents re-embed only new or changed files and delete the
+    chunks of files that disappeared. It lives next to the Chroma files, so
+    wiping the vectorstore directory also wipes the manifest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: dict[str, dict] = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.files = json.load(f).get("files", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable index manifest {path}: {e}")
+
+    @staticmethod
+    def key(path: str) -> str:
+        return os.path.normpath(path)
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def chunk_id(path: str, index: int) -> str:
+        """Stable ID so re-indexing a file upserts instead of duplicating"""
+        digest = hashlib.sha1(IndexManifest.key(path).encode("utf-8")).hexdigest()
+        return f"{digest[:16]}-{index}"
+
+    def get(self, path: str) -> Optional[dict]:
+        return self.files.get(self.key(path))
+
+    def set(
+        self, path: str, content_hash: str, chunk_ids: list[str], doc_type: str
+    ) -> None:
+        self.files[self.key(path)] = {
+            "hash": content_hash,
+            "chunk_ids": chunk_ids,
+            "doc_type": doc_type,
+        }
+
+    def remove(self, path: str) -> list[str]:
+        """Forget a file; returns the chunk IDs that must be deleted"""
+        entry = self.files.pop(self.key(path), None)
+        return entry["chunk_ids"] if entry else []
+
+    def paths_under(self, directory_path: str) -> list[str]:
+        prefix = self.key(directory_path) + os.sep
+        return [path for path in self.files if path.startswith(prefix)]
+
+    def fingerprint(self, doc_type: str) -> str:
+        """Digest of every indexed file of one doc_type; changes on any edit"""
+        digest = hashlib.sha1()
+        for path, entry in sorted(self.files.items()):
+            if entry["doc_type"] == doc_type:
+                digest.update(f"{path}\0{entry['hash']}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def clear(self) -> None:
+        self.files = {}
+
+    def save(self) -> None:
+        """Atomically write the manifest"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
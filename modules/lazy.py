@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# name -> LazySingleton, in registration (import) order
+_registry: dict[str, "LazySingleton"] = {}
+
+
+class LazySingleton(Generic[T]):
+    """
+    Builds a heavy shared object (spaCy model, Chroma, LLM client) on first use
+
+    The factory runs at most once, even when several threads ask at the same
+    time; later callers block until it is ready. A failed build is recorded
+    and retried on the next call.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        _registry[name] = self
+
+    def get(self) -> T:
+        if self._instance is not None:
+            return self._instance
+
+        with self._lock:
+            if self._instance is None:
+                self._loading = True
+                started = time.perf_counter()
+                try:
+                    self._instance = self.factory()
+                    self._error = None
+                except Exception as e:
+                    self._error = str(e)
+                    logger.critical(f"Failed to create {self.name}: {str(e)}")
+                    raise
+                finally:
+                    self._loading = False
+                    self._load_seconds = time.perf_counter() - started
+                logger.info(f"✅ {self.name} ready in {self._load_seconds:.2f}s")
+        return self._instance
+
+    async def aget(self) -> T:
+        """
+        get() for coroutines: while the instance is being built, wait in a
+        worker thread so the event loop keeps serving other requests
+        """
+        if self._instance is not None:
+            return self._instance
+        return await asyncio.to_thread(self.get)
+
+    def set(self, instance: T) -> None:
+        """Install a prebuilt instance instead of calling the factory"""
+        with self._lock:
+            self._instance = instance
+            self._error = None
+
+    def peek(self) -> Optional[T]:
+        """The instance if it has been built, without triggering a build"""
+        return self._instance
+
+    @property
+    def ready(self) -> bool:
+        return self._instance is not None
+
+    def status(self) -> dict:
+        if self._instance is not None:
+            state = "ready"
+        elif self._loading:
+            state = "loading"
+        elif self._error:
+            state = "failed"
+        else:
+            state = "not_loaded"
+        return {
+            "status": state,
+            "load_seconds": (
+                round(self._load_seconds, 3) if self._load_seconds is not None else None
+            ),
+            "error": self._error,
+        }
+
+
+def component_status() -> dict[str, dict]:
+    """Readiness of every registered singleton"""
+    return {name: component.status() for name, component in _registry.items()}
+
+
+async def warm_up(names: Optional[list[str]] = None) -> dict[str, bool]:
+    """
+    Build registered singletons concurrently, each in a worker thread
+
+    Returns:
+        dict: component name -> whether it loaded
+    """
+    components = [
+        component
+        for name, component in _registry.items()
+        if names is None or name in names
+    ]
+
+    async def load(component: LazySingleton) -> bool:
+        try:
+            await asyncio.to_thread(component.get)
+            return True
+        except Exception:
+            return False
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(load(component) for component in components))
+    logger.info(
+        f"Warm-up finished in {time.perf_counter() - started:.2f}s: "
+        f"{sum(results)}/{len(results)} components ready"
+    )
+    return {component.name: ok for component, ok in zip(components, results)}
@@ -1,20 +1,42 @@
+import asyncio
+import hashlib
 import logging
+from typing import AsyncIterator, Optional
 
-from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_groq import ChatGroq
 
 from config.settings import settings
-from modules.pii_masker import pii_masker
-from modules.prompts import CUSTOMER_SUPPORT_PROMPT
+from modules.admission import AdmissionController, AdmissionRejected, is_rate_limited
+from modules.cache import LRUCache
+from modules.lazy import LazySingleton
+from modules.memory import ConversationMemory
+from modules.pii_masker import aget_pii_masker, get_pii_masker
+from modules.prompts import (
+    CUSTOMER_PROFILE_CONTEXT,
+    CUSTOMER_SUPPORT_PROMPT,
+    NEW_CUSTOMER_CONTEXT,
+    RETRIEVED_CONTEXT,
+)
+from modules.rag_retriever import (
+    DOC_TYPE_BUSINESS_INFO,
+    RAGRetriever,
+    aget_rag_retriever,
+    get_rag_retriever,
+    needs_business_lookup,
+)
+from modules.response_cache import SemanticResponseCache
+from modules.session_store import create_session_store
+from modules.timing import span
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global RAG retriever reference (will be set in main.py)
-rag_retriever = None
-
 
 class ChatbotError(Exception):
     """Custom exception for chatbot errors"""
@@ -23,20 +45,68 @@ class ChatbotError(Exception):
 
 
 class ChatbotHandler:
-    def __init__(self):
+    def __init__(self, chat_model: Optional[BaseChatModel] = None):
+        """
+        Args:
+            chat_model: Stand-in for ChatGroq (benchmarks, offline tests);
+                when given, no GROQ_API_KEY is needed
+        """
         try:
-            settings.validate()
-
-            self.groq_chat = ChatGroq(
-                groq_api_key=settings.GROQ_API_KEY,
-                model_name=settings.MODEL_NAME,
-                temperature=0.7,  # Lower = more focused
-                timeout=settings.REQUEST_TIMEOUT,
-                max_retries=2,
-                max_tokens=150,  # LIMIT TOKEN LENGTH (was 500)
-            )
+            if chat_model is not None:
+                self.groq_chat = chat_model
+            else:
+                settings.validate()
+                self.groq_chat = ChatGroq(
+                    groq_api_key=settings.GROQ_API_KEY,
+                    model_name=settings.MODEL_NAME,
+                    temperature=0.7,  # Lower = more focused
+                    timeout=settings.REQUEST_TIMEOUT,
+                    # 429s go straight to the admission controller, which
+                    # owns backoff (limit decrease + Retry-After)
+                    max_retries=0,
+                    max_tokens=150,  # LIMIT TOKEN LENGTH (was 500)
+                )
 
-            self.store = {}
+            # Bounds concurrent Groq calls; saturated turns fail fast
+            self.admission = AdmissionController()
+
+            self.store = create_session_store()
+            self.memory = ConversationMemory(
+                llm=self.groq_chat, admission=self.admission
+            )
+            self.response_cache = SemanticResponseCache()
+            # session -> (profile store generation, resolved profile)
+            self.session_profiles = LRUCache(settings.SESSION_MAX_SESSIONS)
+            self._background_tasks = set()
+            # session -> running compaction; a session in _compaction_rerun
+            # got another turn meanwhile and is checked again afterwards
+            self._compactions: dict[str, asyncio.Task] = {}
+            self._compaction_rerun: set[str] = set()
+
+            # Prompt, chain and history wrapper are built once; per-turn
+            # context is passed in as template variables. Everything before
+            # chat_history is the stable prefix, turn_context is per turn.
+            self.prompt = ChatPromptTemplate.from_messages(
+                [
+                    ("system", CUSTOMER_SUPPORT_PROMPT + "\n\n{customer_context}"),
+                    MessagesPlaceholder(variable_name="chat_history"),
+                    MessagesPlaceholder(variable_name="turn_context", optional=True),
+                    ("human", "{input}"),
+                ]
+            )
+            self.chain = (
+                RunnablePassthrough.assign(
+                    chat_history=lambda x: self.memory.trim(x["chat_history"])
+                )
+                | RunnableLambda(self._format_prompt, afunc=self._aformat_prompt)
+                | self.groq_chat
+            )
+            self.conversation = RunnableWithMessageHistory(
+                self.chain,
+                self.get_session_history,
+                input_messages_key="input",
+                history_messages_key="chat_history",
+            )
 
             logger.info(f"ChatbotHandler initialized with model: {settings.MODEL_NAME}")
 
@@ -44,13 +114,25 @@ class ChatbotHandler:
             logger.error(f"Failed to initialize ChatbotHandler: {str(e)}")
             raise ChatbotError(f"Chatbot initialization failed: {str(e)}")
 
+    @property
+    def rag_retriever(self) -> Optional[RAGRetriever]:
+        """Shared retriever, opened on first use; None if it cannot be built"""
+        try:
+            return get_rag_retriever()
+        except Exception:
+            return None
+
+    async def _aload_rag_retriever(self) -> Optional[RAGRetriever]:
+        """Open the shared retriever (if needed) without blocking the event loop"""
+        try:
+            return await aget_rag_retriever()
+        except Exception:
+            return None
+
     def get_session_history(self, session_id: str):
         """Retrieve or create chat history for a session"""
         try:
-            if session_id not in self.store:
-                self.store[session_id] = ChatMessageHistory()
-                logger.info(f"Created new session: {session_id}")
-            return self.store[session_id]
+            return self.store.get_or_create(session_id)
         except Exception as e:
             logger.error(f"Error accessing session {session_id}: {str(e)}")
             raise ChatbotError(f"Session error: {str(e)}")
@@ -58,8 +140,8 @@ class ChatbotHandler:
     def clear_session(self, session_id: str) -> bool:
         """Clear conversation history for a session"""
         try:
-            if session_id in self.store:
-                del self.store[session_id]
+            self.session_profiles.pop(session_id)
+            if self.store.delete(session_id):
                 logger.info(f"Cleared session: {session_id}")
                 return True
             return False
@@ -67,6 +149,284 @@ class ChatbotHandler:
             logger.error(f"Error clearing session {session_id}: {str(e)}")
             return False
 
+    def _validate_message(self, user_message: str) -> str:
+        """Validate the raw user message and return it stripped"""
+        if not user_message or not user_message.strip():
+            raise ValueError("Message cannot be empty")
+
+        if len(user_message) > settings.MAX_MESSAGE_LENGTH:
+            raise ValueError(
+                f"Message too long (max {settings.MAX_MESSAGE_LENGTH} chars)"
+            )
+
+        return user_message.strip()
+
+    def _schedule_compaction(self, full_session_id: str) -> None:
+        """Summarize turns outside the memory window without delaying the reply"""
+        if not self.memory.summarize:
+            return
+        # One compaction per session at a time, so two never race to rewrite it
+        if full_session_id in self._compactions:
+            self._compaction_rerun.add(full_session_id)
+            return
+        task = asyncio.create_task(self._compact_session(full_session_id))
+        self._compactions[full_session_id] = task
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _compact_session(self, full_session_id: str) -> None:
+        try:
+            while True:
+                self._compaction_rerun.discard(full_session_id)
+                # Backend lookups stay off the event loop
+                history = await asyncio.to_thread(self.store.get, full_session_id)
+                if history is None:  # cleared meanwhile
+                    return
+                await self.memory.acompact(history)
+                if full_session_id not in self._compaction_rerun:
+                    return
+        finally:
+            self._compactions.pop(full_session_id, None)
+            self._compaction_rerun.discard(full_session_id)
+
+    def _session_profile(self, full_session_id: str, customer_id: str):
+        """Customer profile resolved once per session, again after a re-index"""
+        profile_store = self.rag_retriever.profile_store
+        generation = profile_store.generation
+        cached = self.session_profiles.get(full_session_id)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        profile = profile_store.get(customer_id)
+        self.session_profiles.put(full_session_id, (generation, profile))
+        return profile
+
+    def _retrieve(
+        self, masked_message: str, customer_id: str, session_id: str
+    ) -> tuple[Optional[dict], list]:
+        """Session-cached profile plus a vector search if the turn needs one"""
+        try:
+            profile = self._session_profile(f"{customer_id}:{session_id}", customer_id)
+            if not needs_business_lookup(masked_message):
+                logger.info(f"Small talk from {customer_id} - skipping business lookup")
+                return profile, []
+            return profile, self.rag_retriever.search_customer_docs(
+                customer_id, masked_message, profile
+            )
+        except Exception as e:
+            logger.warning(f"RAG retrieval failed: {str(e)}")
+            return None, []
+
+    async def _aretrieve(
+        self, masked_message: str, customer_id: str, session_id: str
+    ) -> tuple[Optional[dict], list]:
+        """Async variant of _retrieve"""
+        try:
+            profile = self._session_profile(f"{customer_id}:{session_id}", customer_id)
+            if not needs_business_lookup(masked_message):
+                logger.info(f"Small talk from {customer_id} - skipping business lookup")
+                return profile, []
+            return profile, await self.rag_retriever.asearch_customer_docs(
+                customer_id, masked_message, profile
+            )
+        except Exception as e:
+            logger.warning(f"RAG retrieval failed: {str(e)}")
+            return None, []
+
+    @staticmethod
+    def _customer_context(customer_id: str, context: str, context_found: bool) -> str:
+        """Render the customer profile (or new-customer note) for the system prompt"""
+        if context_found:
+            return CUSTOMER_PROFILE_CONTEXT.format(
+                customer_id=customer_id, context=context
+            )
+        return NEW_CUSTOMER_CONTEXT.format(customer_id=customer_id)
+
+    @staticmethod
+    def _prompt_context(customer_id: str, profile: Optional[dict], docs: list) -> dict:
+        """
+        Place retrieved context in the prompt
+
+        With PROMPT_PREFIX_CACHING the system message carries only what is
+        fixed for the session (persona + profile) and this turn's search
+        results go in a message right before the user's. Otherwise all of it
+        goes into the system message.
+        """
+        if not settings.PROMPT_PREFIX_CACHING:
+            context = RAGRetriever.format_docs(docs, profile)
+            return {
+                "customer_context": ChatbotHandler._customer_context(
+                    customer_id, context, bool(context)
+                ),
+                "turn_context": [],
+            }
+
+        # Customer chunks only show up here when there is no profile index
+        customer_docs = [
+            doc for doc in docs if doc.metadata.get("customer_id") == customer_id
+        ]
+        other_docs = [doc for doc in docs if doc not in customer_docs]
+        stable = RAGRetriever.format_docs(customer_docs, profile)
+        turn_context = []
+        if other_docs:
+            turn_context.append(
+                SystemMessage(
+                    content=RETRIEVED_CONTEXT.format(
+                        context=RAGRetriever.format_docs(other_docs)
+                    )
+                )
+            )
+        return {
+            "customer_context": ChatbotHandler._customer_context(
+                customer_id, stable, bool(stable)
+            ),
+            "turn_context": turn_context,
+        }
+
+    @staticmethod
+    def _build_turn(
+        masked_message: str,
+        customer_id: str,
+        session_id: str,
+        profile: Optional[dict],
+        docs: list,
+        pii_detected: bool,
+    ) -> dict:
+        """Bundle the chain input, session config and flags for one turn"""
+        full_session_id = f"{customer_id}:{session_id}"
+        # Filled in by _format_prompt when the chain runs
+        token_report: dict = {}
+        return {
+            "input": {
+                "input": masked_message,
+                **ChatbotHandler._prompt_context(customer_id, profile, docs),
+                "token_report": token_report,
+            },
+            "customer_id": customer_id,
+            "session_id": full_session_id,
+            "config": {"configurable": {"session_id": full_session_id}},
+            "pii_masked": pii_detected,
+            "context_retrieved": bool(profile or docs),
+            "cache_vector": None,
+            "cache_version": None,
+            "cache_context": None,
+            "token_report": token_report,
+        }
+
+    def _format_prompt(self, inputs: dict):
+        """
+        Fill the prebuilt prompt and record its approximate token split
+
+        Runs inside the chain, so the history counted is the one the chain
+        loaded for this call and the prompt is formatted only once. The
+        split (stable prefix, history, this turn) goes into the turn's
+        token_report.
+        """
+        prompt = self.prompt.invoke(inputs)
+        messages = prompt.to_messages()
+        suffix_length = len(inputs["turn_context"]) + 1
+
+        report = inputs["token_report"]
+        report.update(
+            prefix_caching=settings.PROMPT_PREFIX_CACHING,
+            prefix=count_tokens_approximately(messages[:1]),
+            history=count_tokens_approximately(messages[1:-suffix_length]),
+            turn=count_tokens_approximately(messages[-suffix_length:]),
+        )
+        report["total"] = report["prefix"] + report["history"] + report["turn"]
+        logger.info(
+            f"Prompt ~{report['total']} tokens: {report['prefix']} prefix, "
+            f"{report['history']} history, {report['turn']} this turn"
+        )
+        return prompt
+
+    async def _aformat_prompt(self, inputs: dict):
+        # Formatting is CPU-only; no need to hop to a worker thread
+        return self._format_prompt(inputs)
+
+    @staticmethod
+    def _with_usage(report: dict, response) -> dict:
+        """Attach the provider's token usage (incl. cached prefix tokens)"""
+        usage = getattr(response, "usage_metadata", None)
+        return {**report, "usage": dict(usage) if usage else None}
+
+    def _cacheable(self, customer_id: str, session_id: str, pii_detected: bool) -> bool:
+        """Only general answers are shared: no PII and no profile in the prompt"""
+        rag_retriever = self.rag_retriever
+        return (
+            self.response_cache.enabled
+            and not pii_detected
+            and rag_retriever is not None
+            and rag_retriever.vectorstore is not None
+            # Without a profile index, profile chunks can still come from Chroma
+            and rag_retriever.profile_store.generation is not None
+            and self._session_profile(f"{customer_id}:{session_id}", customer_id)
+            is None
+        )
+
+    def _history_fingerprint(self, history: list) -> str:
+        """Fingerprint of the trimmed history that goes into the prompt"""
+        digest = hashlib.sha256()
+        for message in self.memory.trim(history):
+            digest.update(f"{message.type}:{message.content}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _cached_response(self, turn: dict) -> Optional[str]:
+        """Serve a cached answer and record the turn as if the LLM had replied"""
+        if turn["cache_vector"] is None:
+            return None
+
+        response = self.response_cache.get(
+            turn["cache_vector"], turn["cache_version"], turn["cache_context"]
+        )
+        if response is None:
+            return None
+
+        logger.info(f"Response cache hit for customer {turn['customer_id']}")
+        self.get_session_history(turn["session_id"]).add_messages(
+            [HumanMessage(content=turn["input"]["input"]), AIMessage(content=response)]
+        )
+        return response
+
+    def _cache_response(self, turn: dict, response: str) -> None:
+        if turn["cache_vector"] is None or not response:
+            return
+        # Never share an answer that names the customer or predates a re-index
+        if turn["customer_id"] in response:
+            return
+        version = self.rag_retriever.index_version(DOC_TYPE_BUSINESS_INFO)
+        if version != turn["cache_version"]:
+            return
+        self.response_cache.put(
+            turn["cache_vector"],
+            turn["input"]["input"],
+            response,
+            turn["cache_version"],
+            turn["cache_context"],
+        )
+
+    def _map_error(self, e: Exception, customer_id: str) -> Exception:
+        """
+        Map pipeline failures onto user-facing ChatbotErrors
+
+        A provider 429 becomes AdmissionRejected: the client is asked to back
+        off (503 + Retry-After) like when our own queue is full.
+        """
+        if is_rate_limited(e):
+            logger.warning(f"LLM provider rate limited customer {customer_id}")
+            return self.admission.rate_limit_rejection(e)
+
+        if isinstance(e, ValueError):
+            logger.warning(f"Validation error: {str(e)}")
+            return ChatbotError(f"Input validation failed: {str(e)}")
+
+        if isinstance(e, TimeoutError):
+            logger.error(f"Timeout error for customer {customer_id}: {str(e)}")
+            return ChatbotError("Request timed out. Please try again.")
+
+        logger.error(f"Unexpected error in get_response: {str(e)}", exc_info=True)
+        return ChatbotError(f"Failed to generate response: {str(e)}")
+
     def get_response(
         self, user_message: str, customer_id: str, session_id: str = "default"
     ) -> dict:
@@ -82,102 +442,306 @@ class ChatbotHandler:
             dict: {
                 "response": str,
                 "pii_masked": bool,
-                "context_retrieved": bool
+                "context_retrieved": bool,
+                "cached": bool,
+                "token_usage": dict (prompt token estimate + provider usage)
             }
         """
         try:
-            # Input validation
-            if not user_message or not user_message.strip():
-                raise ValueError("Message cannot be empty")
-
-            if len(user_message) > settings.MAX_MESSAGE_LENGTH:
-                raise ValueError(
-                    f"Message too long (max {settings.MAX_MESSAGE_LENGTH} chars)"
-                )
-
-            clean_message = user_message.strip()
+            with span("validation"):
+                clean_message = self._validate_message(user_message)
 
             # Step 1: PII Masking
-            masked_message, pii_detected = pii_masker.mask_pii(clean_message)
+            with span("pii_masking"):
+                masked_message, pii_detected = get_pii_masker().mask_pii(clean_message)
             if pii_detected:
                 logger.info(f"PII detected and masked for customer {customer_id}")
 
             # Step 2: Customer-specific RAG Retrieval
-            context = ""
-            context_found = False
-
-            global rag_retriever
+            rag_retriever = self.rag_retriever
+            profile, docs = None, []
             if rag_retriever and rag_retriever.vectorstore:
-                try:
-                    context, context_found = rag_retriever.retrieve_customer_context(
-                        customer_id=customer_id, query=masked_message
-                    )
-                except Exception as e:
-                    logger.warning(f"RAG retrieval failed: {str(e)}")
-                    context_found = False
+                profile, docs = self._retrieve(masked_message, customer_id, session_id)
             else:
                 logger.warning("RAG not available - responses will not be personalized")
 
-            # Step 3: Build prompt with context
-            # Step 3: Build prompt with context
-            system_prompt = CUSTOMER_SUPPORT_PROMPT
-            if context_found:
-                system_prompt += f"\n\n=== CUSTOMER PROFILE FOR {customer_id} ===\n{context}\n\nUse this information naturally in your responses. Reference their favorites, habits, and loyalty status as if you remember them from previous visits."
-            else:
-                system_prompt += f"\n\nNote: This is a new customer ({customer_id}). Provide general helpful information and offer to help them discover our menu and loyalty program."
+            # Step 3: Fill the prebuilt prompt with this turn's context
+            # (customer_id in the session id keeps sessions isolated)
+            with span("prompt_build"):
+                turn = self._build_turn(
+                    masked_message, customer_id, session_id, profile, docs, pii_detected
+                )
+            context_found = turn["context_retrieved"]
 
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    ("system", system_prompt),
-                    MessagesPlaceholder(variable_name="chat_history"),
-                    ("human", "{input}"),
-                ]
-            )
+            # General questions may already have a cached answer
+            if self._cacheable(customer_id, session_id, pii_detected):
+                turn["cache_vector"] = rag_retriever.embeddings.embed_query(
+                    masked_message
+                )
+                turn["cache_version"] = rag_retriever.index_version(
+                    DOC_TYPE_BUSINESS_INFO
+                )
+                turn["cache_context"] = self._history_fingerprint(
+                    self.get_session_history(turn["session_id"]).messages
+                )
+                cached = self._cached_response(turn)
+                if cached is not None:
+                    return {
+                        "response": cached,
+                        "pii_masked": pii_detected,
+                        "context_retrieved": context_found,
+                        "cached": True,
+                        "token_usage": None,
+                    }
+
+            # Step 4: Invoke LLM
+            logger.info(f"Processing message for customer {customer_id}")
+            with self.admission.slot(), span("llm_call"):
+                response = self.conversation.invoke(
+                    turn["input"], config=turn["config"]
+                )
 
-            # Step 4: LCEL chain
-            chain = prompt | self.groq_chat
+            logger.info(f"Response generated for customer {customer_id}")
+            self._cache_response(turn, response.content)
 
-            # Use customer_id in session for isolation
-            full_session_id = f"{customer_id}:{session_id}"
+            # Step 5: Keep stored history bounded
+            if self.memory.summarize:
+                self.memory.compact(self.get_session_history(turn["session_id"]))
 
-            conversation = RunnableWithMessageHistory(
-                chain,
-                self.get_session_history,
-                input_messages_key="input",
-                history_messages_key="chat_history",
+            return {
+                "response": response.content,
+                "pii_masked": pii_detected,
+                "context_retrieved": context_found,
+                "cached": False,
+                "token_usage": self._with_usage(turn["token_report"], response),
+            }
+
+        except AdmissionRejected:
+            raise
+
+        except Exception as e:
+            raise self._map_error(e, customer_id)
+
+    async def _aprepare_turn(
+        self, user_message: str, customer_id: str, session_id: str
+    ) -> dict:
+        """
+        Run the async pre-LLM stages (validation, PII masking, RAG) for a turn
+
+        Returns:
+            dict: chain input, session id, invoke config, PII/RAG flags and
+                the response-cache key (None when the turn is personalized)
+        """
+        with span("validation"):
+            clean_message = self._validate_message(user_message)
+
+        # Step 1: PII Masking
+        with span("pii_masking"):
+            pii_masker = await aget_pii_masker()
+            masked_message, pii_detected = await pii_masker.amask_pii(clean_message)
+        if pii_detected:
+            logger.info(f"PII detected and masked for customer {customer_id}")
+
+        # Step 2: Customer-specific RAG Retrieval (opens Chroma on first use)
+        rag_retriever = await self._aload_rag_retriever()
+        profile, docs = None, []
+        if rag_retriever and rag_retriever.vectorstore:
+            profile, docs = await self._aretrieve(
+                masked_message, customer_id, session_id
             )
+        else:
+            logger.warning("RAG not available - responses will not be personalized")
 
-            # Step 5: Invoke LLM
-            logger.info(f"Processing message for customer {customer_id}")
-            response = conversation.invoke(
-                {"input": masked_message},
-                config={"configurable": {"session_id": full_session_id}},
+        # Step 3: Fill the prebuilt prompt with this turn's context
+        with span("prompt_build"):
+            turn = self._build_turn(
+                masked_message, customer_id, session_id, profile, docs, pii_detected
+            )
+
+        # The query vector is already in the embedding cache from retrieval
+        if self._cacheable(customer_id, session_id, pii_detected):
+            turn["cache_vector"] = await rag_retriever.embeddings.aembed_query(
+                masked_message
             )
+            turn["cache_version"] = rag_retriever.index_version(DOC_TYPE_BUSINESS_INFO)
+            # Persistent stores load the history in a worker thread
+            history = await self.get_session_history(turn["session_id"]).aget_messages()
+            turn["cache_context"] = self._history_fingerprint(history)
+        return turn
+
+    async def aget_response(
+        self, user_message: str, customer_id: str, session_id: str = "default"
+    ) -> dict:
+        """
+        Async variant of get_response
+
+        PII masking runs on the masker's bounded executor, the query is
+        embedded asynchronously and the LLM call is awaited via ainvoke, so
+        the event loop is free while a turn waits on Groq.
+
+        Args:
+            user_message: User's chat message
+            customer_id: Customer identifier (e.g., "CUST-001")
+            session_id: Session identifier (default: "default")
+
+        Returns:
+            dict: same shape as get_response
+        """
+        try:
+            turn = await self._aprepare_turn(user_message, customer_id, session_id)
+
+            cached = self._cached_response(turn)
+            if cached is not None:
+                return {
+                    "response": cached,
+                    "pii_masked": turn["pii_masked"],
+                    "context_retrieved": turn["context_retrieved"],
+                    "cached": True,
+                    "token_usage": None,
+                }
+
+            # Step 4: Invoke LLM
+            logger.info(f"Processing message for customer {customer_id}")
+            async with self.admission.aslot():
+                with span("llm_call"):
+                    response = await self.conversation.ainvoke(
+                        turn["input"], config=turn["config"]
+                    )
 
             logger.info(f"Response generated for customer {customer_id}")
+            self._cache_response(turn, response.content)
+            self._schedule_compaction(turn["session_id"])
 
             return {
                 "response": response.content,
-                "pii_masked": pii_detected,
-                "context_retrieved": context_found,
+                "pii_masked": turn["pii_masked"],
+                "context_retrieved": turn["context_retrieved"],
+                "cached": False,
+                "token_usage": self._with_usage(turn["token_report"], response),
             }
 
-        except ValueError as e:
-            logger.warning(f"Validation error: {str(e)}")
-            raise ChatbotError(f"Input validation failed: {str(e)}")
+        except AdmissionRejected:
+            raise
 
-        except TimeoutError as e:
-            logger.error(f"Timeout error for customer {customer_id}: {str(e)}")
-            raise ChatbotError("Request timed out. Please try again.")
+        except Exception as e:
+            raise self._map_error(e, customer_id)
 
+    async def _produce_stream(self, turn: dict, chunks: asyncio.Queue) -> None:
+        """
+        Stream the LLM reply into `chunks` while holding an admission slot
+
+        Puts ("chunk", chunk) per chunk and then ("end", None), or
+        ("error", exception) on failure.
+        """
+        try:
+            async with self.admission.aslot():
+                with span("llm_call"):
+                    async for chunk in self.conversation.astream(
+                        turn["input"], config=turn["config"]
+                    ):
+                        chunks.put_nowait(("chunk", chunk))
+            chunks.put_nowait(("end", None))
         except Exception as e:
-            logger.error(f"Unexpected error in get_response: {str(e)}", exc_info=True)
-            raise ChatbotError(f"Failed to generate response: {str(e)}")
+            chunks.put_nowait(("error", e))
+
+    async def astream_response(
+        self, user_message: str, customer_id: str, session_id: str = "default"
+    ) -> AsyncIterator[dict]:
+        """
+        Stream a response token by token
+
+        The session history still receives the complete AI message once the
+        stream finishes (RunnableWithMessageHistory aggregates the chunks).
+
+        Yields:
+            dict: {"type": "meta", "pii_masked": bool, "context_retrieved": bool,
+                  "cached": bool} first, then {"type": "token", "content": str}
+                  per chunk and finally {"type": "done", "response": str,
+                  "token_usage": dict}. A cached answer arrives as a single
+                  token event.
+
+        Raises:
+            AdmissionRejected: before the first event, if the LLM is saturated
+                or the provider rate-limits the call
+        """
+        try:
+            turn = await self._aprepare_turn(user_message, customer_id, session_id)
+            cached = self._cached_response(turn)
+            meta = {
+                "type": "meta",
+                "pii_masked": turn["pii_masked"],
+                "context_retrieved": turn["context_retrieved"],
+                "cached": cached is not None,
+            }
+
+            if cached is not None:
+                yield meta
+                yield {"type": "token", "content": cached}
+                yield {"type": "done", "response": cached, "token_usage": None}
+                return
+
+            # Upstream generation runs in its own task so the admission slot
+            # (and the latency it reports) ends with generation rather than
+            # with a slow client reading the tokens
+            chunks: asyncio.Queue = asyncio.Queue()
+            producer = asyncio.create_task(self._produce_stream(turn, chunks))
+            try:
+                # Nothing is sent until upstream answers, so a saturated LLM
+                # or a provider 429 can still be reported as a plain 503
+                kind, value = await chunks.get()
+                if kind == "error":
+                    raise value
+                yield meta
+
+                logger.info(f"Streaming response for customer {customer_id}")
+                parts = []
+                usage_chunk = None
+                while kind == "chunk":
+                    if getattr(value, "usage_metadata", None):
+                        usage_chunk = value
+                    if value.content:
+                        parts.append(value.content)
+                        yield {"type": "token", "content": value.content}
+                    kind, value = await chunks.get()
+                if kind == "error":
+                    raise value
+            finally:
+                # Client gone or failed: stop generating and free the slot
+                producer.cancel()
+
+            logger.info(f"Response streamed for customer {customer_id}")
+            response = "".join(parts)
+            self._cache_response(turn, response)
+            self._schedule_compaction(turn["session_id"])
+            yield {
+                "type": "done",
+                "response": response,
+                "token_usage": self._with_usage(turn["token_report"], usage_chunk),
+            }
+
+        except AdmissionRejected:
+            raise
+
+        except Exception as e:
+            raise self._map_error(e, customer_id)
+
+
+# Shared instance, built on first use or by the startup warm-up
+_chatbot = LazySingleton("chatbot", ChatbotHandler)
+
+
+def get_chatbot() -> ChatbotHandler:
+    """Shared ChatbotHandler; the first call creates the Groq client"""
+    return _chatbot.get()
+
+
+async def aget_chatbot() -> ChatbotHandler:
+    """get_chatbot for async code; never blocks the event loop on warm-up"""
+    return await _chatbot.aget()
 
 
-# Initialize singleton
-try:
-    chatbot = ChatbotHandler()
-except Exception as e:
-    logger.critical(f"Failed to create chatbot instance: {str(e)}")
-    raise
+def __getattr__(name: str):
+    # Back-compat: `from modules.llm_handler import chatbot` still works (and builds it)
+    if name == "chatbot":
+        return get_chatbot()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import Optional
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+
+from config.settings import settings
+from modules.prompts import CONVERSATION_SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+class ConversationMemory:
+    """
+    Keep prompt history flat for long sessions
+
+    trim() is applied to every prompt: the last `max_turns` exchanges are
+    kept verbatim and then cut to `max_tokens`. When summarization is on,
+    compact() folds the turns that fell out of the window into a rolling
+    summary stored at the head of the session history, once at least
+    `compact_threshold` turns have fallen out (the window keeps the prompt
+    bounded in between). Summary calls take an admission slot like any
+    other LLM call.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        max_turns: int = settings.MEMORY_LENGTH,
+        max_tokens: int = settings.MEMORY_MAX_TOKENS,
+        summarize: bool = settings.MEMORY_SUMMARIZE,
+        compact_threshold: int = settings.MEMORY_COMPACT_THRESHOLD,
+        admission=None,
+    ):
+        self.llm = llm
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarize = summarize and llm is not None
+        self.compact_threshold = max(compact_threshold, 1)
+        self.admission = admission  # AdmissionController or None
+
+    def _split(
+        self, messages: list[BaseMessage]
+    ) -> tuple[Optional[BaseMessage], list[BaseMessage], list[BaseMessage]]:
+        """Split history into (summary, older messages, recent window)"""
+        summary = None
+        if messages and isinstance(messages[0], SystemMessage):
+            summary, messages = messages[0], messages[1:]
+
+        cut = max(len(messages) - 2 * self.max_turns, 0)
+        # The window always starts on a human message
+        while cut < len(messages) and not isinstance(messages[cut], HumanMessage):
+            cut += 1
+
+        return summary, messages[:cut], messages[cut:]
+
+    def trim(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        """Return the part of the history that goes into the prompt"""
+        summary, _, recent = self._split(messages)
+
+        recent = trim_messages(
+            recent,
+            max_tokens=self.max_tokens,
+            token_counter=count_tokens_approximately,
+            strategy="last",
+            start_on="human",
+        )
+
+        return [summary, *recent] if summary else recent
+
+    def _summary_request(
+        self, summary: Optional[BaseMessage], older: list[BaseMessage]
+    ) -> list[BaseMessage]:
+        previous = summary.content.removeprefix(SUMMARY_PREFIX) if summary else ""
+        transcript = "\n".join(f"{m.type}: {m.content}" for m in older)
+        return [
+            HumanMessage(
+                content=CONVERSATION_SUMMARY_PROMPT.format(
+                    summary=previous or "(none)", transcript=transcript
+                )
+            )
+        ]
+
+    def _due(self, older: list[BaseMessage]) -> bool:
+        """Enough turns have left the window to be worth a summary call"""
+        return len(older) >= 2 * self.compact_threshold
+
+    def _plan(
+        self, history: BaseChatMessageHistory
+    ) -> Optional[tuple[list[BaseMessage], list[BaseMessage], list[BaseMessage]]]:
+        """
+        Snapshot the history and decide whether to compact it
+
+        Returns:
+            tuple: (snapshot, recent window, summary request), or None when
+                no summary is due
+        """
+        if not self.summarize:
+            return None
+
+        snapshot = list(history.messages)
+        summary, older, recent = self._split(snapshot)
+        if not self._due(older):
+            return None
+        return snapshot, recent, self._summary_request(summary, older)
+
+    def _replace(
+        self,
+        history: BaseChatMessageHistory,
+        snapshot: list[BaseMessage],
+        recent: list[BaseMessage],
+        summary_text: str,
+    ) -> bool:
+        current = history.messages
+        # Rewritten or cleared while we were summarizing: our summary is stale
+        if current[: len(snapshot)] != snapshot:
+            logger.info("History changed during compaction, skipping rewrite")
+            return False
+        logger.info(
+            f"Folded {len(snapshot) - len(recent)} messages into conversation summary"
+        )
+        # Turns appended while we were summarizing are kept after the window
+        messages = [
+            SystemMessage(content=SUMMARY_PREFIX + summary_text),
+            *recent,
+            *current[len(snapshot) :],
+        ]
+        # Session stores rewrite in place so analytics still count old turns
+        replace = getattr(history, "replace_messages", None)
+        if replace is not None:
+            return replace(messages) is not False
+        history.clear()
+        history.add_messages(messages)
+        return True
+
+    def compact(self, history: BaseChatMessageHistory) -> bool:
+        """Fold turns outside the window into the rolling summary"""
+        plan = self._plan(history)
+        if plan is None:
+            return False
+        snapshot, recent, request = plan
+
+        try:
+            with self.admission.slot() if self.admission else nullcontext():
+                result = self.llm.invoke(request)
+        except Exception as e:
+            logger.warning(f"History summarization failed: {str(e)}")
+            return False
+
+        return self._replace(history, snapshot, recent, result.content)
+
+    async def acompact(self, history: BaseChatMessageHistory) -> bool:
+        """
+        Async variant of compact
+
+        Reading and rewriting the history (storage round trips, the session
+        store's flush lock) run in worker threads; only the summary call
+        is awaited on the event loop.
+        """
+        plan = await asyncio.to_thread(self._plan, history)
+        if plan is None:
+            return False
+        snapshot, recent, request = plan
+
+        try:
+            async with self.admission.aslot() if self.admission else nullcontext():
+                result = await self.llm.ainvoke(request)
+        except Exception as e:
+            logger.warning(f"History summarization failed: {str(e)}")
+            return False
+
+        return await asyncio.to_thread(
+            self._replace, history, snapshot, recent, result.content
+        )
@@ -1,61 +1,515 @@
+import asyncio
 import logging
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Optional
 
-from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, RecognizerRegistry
+from presidio_analyzer.nlp_engine import NlpEngineProvider
+from presidio_analyzer.predefined_recognizers import (
+    CreditCardRecognizer,
+    EmailRecognizer,
+    IbanRecognizer,
+    PhoneRecognizer,
+    SpacyRecognizer,
+    UsSsnRecognizer,
+)
 from presidio_anonymizer import AnonymizerEngine
 
+from config.settings import settings
+from modules.lazy import LazySingleton
+from modules.waiters import Waiter, await_grant
+
 logger = logging.getLogger(__name__)
 
+# The only entity types we mask
+PII_ENTITIES = [
+    "PHONE_NUMBER",
+    "EMAIL_ADDRESS",
+    "PERSON",
+    "CREDIT_CARD",
+    "IBAN_CODE",
+    "US_SSN",
+]
+
+
+def build_analyzer(spacy_model: str = settings.PII_SPACY_MODEL) -> AnalyzerEngine:
+    """
+    AnalyzerEngine with only the recognizers behind PII_ENTITIES
+
+    The default AnalyzerEngine() loads en_core_web_lg and every predefined
+    recognizer; here English gets six recognizers on a configurable (by
+    default much smaller) spaCy model.
+    """
+    nlp_engine = NlpEngineProvider(
+        nlp_configuration={
+            "nlp_engine_name": "spacy",
+            "models": [{"lang_code": "en", "model_name": spacy_model}],
+        }
+    ).create_engine()
+
+    registry = RecognizerRegistry(
+        recognizers=[
+            PhoneRecognizer(),
+            EmailRecognizer(),
+            SpacyRecognizer(supported_entities=["PERSON"]),
+            CreditCardRecognizer(),
+            IbanRecognizer(),
+            UsSsnRecognizer(),
+        ],
+        supported_languages=["en"],
+    )
+    return AnalyzerEngine(
+        registry=registry, nlp_engine=nlp_engine, supported_languages=["en"]
+    )
+
+
+# Pre-screen: a message with none of these signals cannot contain the entities
+# we mask, so the spaCy NER pipeline is skipped. Every pattern errs towards
+# "maybe PII" - a false alarm only costs a full analysis.
+PRESCREEN_PATTERNS = {
+    # phone / card / SSN / IBAN all need a long run of digits
+    "digits": re.compile(r"(?:\d[\s().\-/+]*){6,}"),
+    "email": re.compile(r"\S@\S"),
+    "iban": re.compile(r"\b[A-Za-z]{2}\d{2}(?:\s?[A-Za-z0-9]){11,30}\b"),
+    # names introduced in lower case ("my name is john")
+    "name_phrase": re.compile(
+        r"\b(?:my name|name's|i am|i'm|im|this is|call me|it's|its)\b", re.I
+    ),
+}
+SENTENCE_START = re.compile(r"(?:^|[.!?]\s+|\n)\W*(\w+)")
+# Any word starting with a letter; capitalization is checked with
+# str.isupper() so "Élodie" or "Ólafur" count as well as ASCII names
+WORD_TOKEN = re.compile(r"\b[^\W\d_][\w'-]*")
+
+# Capitalized words that are not names when they open a sentence (words
+# that double as given names - Will, May, Can, An - are left out)
+COMMON_SENTENCE_STARTERS = frozenset(
+    """
+    a and any are as at be but could did do does for good great hello
+    hey hi how i if in is it my no not of ok okay on one or please so
+    thank thanks that the there these this two what when where which who why
+    with would yes you your
+    """.split()
+)
+
+
+def prescreen(text: str) -> Optional[str]:
+    """
+    Cheap PII check that runs before Presidio
+
+    Returns:
+        str: name of the first signal found (run full analysis), or None if
+             none of the signals the masked entities need is present
+    """
+    for name, pattern in PRESCREEN_PATTERNS.items():
+        if pattern.search(text):
+            return name
+
+    # PERSON: any capitalized token, except a common word opening a sentence
+    starters = {m.start(1) for m in SENTENCE_START.finditer(text)}
+    for match in WORD_TOKEN.finditer(text):
+        first = match.group()[0]
+        if not (first.isupper() or first.istitle()):
+            continue
+        if (
+            match.start() in starters
+            and match.group().lower().split("'")[0] in COMMON_SENTENCE_STARTERS
+        ):
+            continue
+        if match.group() == "I" or match.group().startswith("I'"):
+            continue
+        return "capitalized"
+
+    return None
+
+
+# Analyzer/anonymizer pair owned by a worker process (see PIIWorkerPool)
+_worker_engines: Optional[tuple[AnalyzerEngine, AnonymizerEngine]] = None
+
+
+def _init_worker(spacy_model: str) -> None:
+    global _worker_engines
+    _worker_engines = (build_analyzer(spacy_model), AnonymizerEngine())
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def _worker_mask(text: str) -> tuple[str, bool, int]:
+    """Analyze and anonymize one text inside a worker process"""
+    analyzer, anonymizer = _worker_engines
+    results = analyzer.analyze(text=text, entities=PII_ENTITIES, language="en")
+    if not results:
+        return text, False, 0
+    anonymized_result = anonymizer.anonymize(text=text, analyzer_results=results)
+    return anonymized_result.text, True, len(results)
+
+
+class SlotSemaphore:
+    """
+    Bounded semaphore shared by threads and coroutines
+
+    Waiters are served in FIFO order through the same waiter queue as the
+    LLM admission controller (modules.waiters), so a waiting coroutine holds
+    no thread and one cancelled after being granted a slot hands it on.
+    """
+
+    def __init__(self, capacity: int):
+        self._lock = threading.Lock()
+        self._free = capacity
+        self._waiters: deque[Waiter] = deque()
+
+    def _try_take(self) -> bool:
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return True
+        return False
+
+    def acquire(self, timeout: float) -> bool:
+        with self._lock:
+            if self._try_take():
+                return True
+            waiter = Waiter.for_thread()
+            self._waiters.append(waiter)
+
+        waiter.event.wait(timeout)
+        with self._lock:
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+            return waiter.granted
+
+    async def aacquire(self, timeout: float) -> bool:
+        """Async variant of acquire"""
+        with self._lock:
+            if self._try_take():
+                return True
+            waiter = Waiter.for_coroutine()
+            self._waiters.append(waiter)
+
+        await await_grant(waiter, timeout, self._lock, self._waiters, self._release)
+        with self._lock:
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+            return waiter.granted
+
+    def release(self) -> None:
+        with self._lock:
+            self._release()
+
+    def _release(self) -> None:
+        # Hand the slot to the oldest waiter, or return it to the pool
+        while self._waiters:
+            if self._waiters.popleft().grant():
+                return
+        self._free += 1
+
+    @property
+    def waiting(self) -> int:
+        with self._lock:
+            return len(self._waiters)
+
+
+class PIIWorkerPool:
+    """
+    Pre-warmed worker processes, each with its own analyzer/anonymizer pair
+
+    spaCy NER holds the GIL, so threads cap masking at about one core; the
+    pool spreads it across processes. At most `workers + queue_size` texts
+    are submitted at once - further callers wait for a slot (up to the
+    caller's timeout) instead of growing an unbounded queue.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int = settings.PII_PROCESS_QUEUE_SIZE,
+        spacy_model: str = settings.PII_SPACY_MODEL,
+    ):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        # spawn, not fork: the API process has threads (executors, uvicorn)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(spacy_model,),
+        )
+        self._slots = SlotSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+
+    def warm_up(self) -> int:
+        """Start every worker and wait until its spaCy model is loaded"""
+        futures = [self.executor.submit(_worker_ready) for _ in range(self.workers)]
+        pids = {future.result() for future in futures}
+        logger.info(f"PII worker pool ready: {self.workers} processes")
+        return len(pids)
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+            if delta > 0:
+                self.submitted += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release(self, _future: Future) -> None:
+        self._track(-1)
+        self._slots.release()
+
+    def _dispatch(self, text: str) -> Future:
+        try:
+            future = self.executor.submit(_worker_mask, text)
+        except Exception:
+            self._slots.release()
+            raise
+        self._track(1)
+        future.add_done_callback(self._release)
+        return future
+
+    def submit(self, text: str, timeout: float) -> Optional[Future]:
+        """Queue a text for masking; None if no slot freed up within timeout"""
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.rejected += 1
+            return None
+        return self._dispatch(text)
+
+    async def asubmit(self, text: str, timeout: float) -> Optional[asyncio.Future]:
+        """Async variant of submit; waiting for a slot does not block the loop"""
+        if not await self._slots.aacquire(timeout):
+            with self._lock:
+                self.rejected += 1
+            return None
+        return asyncio.wrap_future(self._dispatch(text))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.in_flight - self.workers),
+                "peak_in_flight": self.peak_in_flight,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
 
 class PIIMasker:
     """Handle PII detection and masking using Microsoft Presidio"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        strict: bool = settings.PII_STRICT_MODE,
+        workers: int = settings.PII_PROCESS_WORKERS,
+    ):
+        """
+        Args:
+            strict: Always run full analysis (no pre-screen)
+            workers: Worker processes for mask_pii/amask_pii; 0 analyzes
+                in this process. The local analyzer is still built for
+                mask_many and as the fallback when the pool is saturated.
+        """
         try:
-            self.analyzer = AnalyzerEngine()
+            self.strict = strict
+            self._counts = Counter()
+            self._counts_lock = threading.Lock()
+            self.analyzer = build_analyzer()
+            self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
             self.anonymizer = AnonymizerEngine()
+            # Bounded pool so async callers never queue unlimited CPU-bound work
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.PII_MAX_WORKERS, thread_name_prefix="pii-masker"
+            )
+            self.pool = None
+            if workers > 0:
+                self.pool = PIIWorkerPool(workers)
+                self.pool.warm_up()
             logger.info("PIIMasker initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize PIIMasker: {str(e)}")
             raise
 
+    def _count(self, key: str) -> None:
+        with self._counts_lock:
+            self._counts[key] += 1
+
+    def _needs_analysis(self, text: str) -> bool:
+        """Run the pre-screen (unless strict) and record the outcome"""
+        if not self.strict:
+            signal = prescreen(text)
+            if signal is None:
+                self._count("skipped")
+                return False
+            self._count(f"signal:{signal}")
+        self._count("analyzed")
+        return True
+
     def mask_pii(self, text: str) -> tuple[str, bool]:
         """
         Detect and mask PII in text
 
+        Messages the pre-screen proves clean skip Presidio entirely, unless
+        strict mode is on. With a worker pool, full analysis runs in one of
+        its processes.
+
         Returns:
             tuple: (masked_text, pii_detected)
         """
         try:
-            # Analyze text for PII entities
-            results = self.analyzer.analyze(
-                text=text,
-                entities=[
-                    "PHONE_NUMBER",
-                    "EMAIL_ADDRESS",
-                    "PERSON",
-                    "CREDIT_CARD",
-                    "IBAN_CODE",
-                    "US_SSN",
-                ],
+            if not self._needs_analysis(text):
+                return text, False
+
+            if self.pool is not None:
+                future = self.pool.submit(text, settings.PII_PROCESS_QUEUE_TIMEOUT)
+                if future is not None:
+                    return self._pool_result(future.result())
+                logger.warning("PII worker pool saturated - masking in-process")
+
+            return self._mask_local(text)
+
+        except Exception as e:
+            logger.error(f"Error in PII masking: {str(e)}")
+            # Return original text if masking fails (fail-safe)
+            return text, False
+
+    @staticmethod
+    def _pool_result(result: tuple[str, bool, int]) -> tuple[str, bool]:
+        masked_text, detected, entities = result
+        if detected:
+            logger.info(f"PII detected and masked: {entities} entities")
+        return masked_text, detected
+
+    def _mask_local(self, text: str) -> tuple[str, bool]:
+        """Full analysis with this process's analyzer"""
+        # Analyze text for PII entities
+        results = self.analyzer.analyze(text=text, entities=PII_ENTITIES, language="en")
+
+        if results:
+            # Mask detected entities
+            anonymized_result = self.anonymizer.anonymize(
+                text=text, analyzer_results=results
+            )
+
+            logger.info(f"PII detected and masked: {len(results)} entities")
+            return anonymized_result.text, True
+
+        return text, False
+
+    def mask_many(
+        self,
+        texts: Iterable[str],
+        batch_size: int = settings.PII_BATCH_SIZE,
+        n_process: int = settings.PII_N_PROCESS,
+    ) -> list[tuple[str, bool]]:
+        """
+        Mask many texts at once (stored transcripts, bulk-ingested notes)
+
+        Texts that need full analysis go through BatchAnalyzerEngine, i.e.
+        spaCy nlp.pipe, with n_process > 1 spreading batches across cores.
+
+        Returns:
+            list: one (masked_text, pii_detected) tuple per input, in order
+        """
+        texts = list(texts)
+        masked = [(text, False) for text in texts]
+        pending = [i for i, text in enumerate(texts) if self._needs_analysis(text)]
+        if not pending:
+            return masked
+
+        try:
+            results = self.batch_analyzer.analyze_iterator(
+                [texts[i] for i in pending],
                 language="en",
+                batch_size=batch_size,
+                n_process=n_process,
+                entities=PII_ENTITIES,
             )
 
-            if results:
-                # Mask detected entities
-                anonymized_result = self.anonymizer.anonymize(
-                    text=text, analyzer_results=results
-                )
+            detected = 0
+            for i, analyzer_results in zip(pending, results):
+                if analyzer_results:
+                    anonymized_result = self.anonymizer.anonymize(
+                        text=texts[i], analyzer_results=analyzer_results
+                    )
+                    masked[i] = (anonymized_result.text, True)
+                    detected += 1
 
-                logger.info(f"PII detected and masked: {len(results)} entities")
-                return anonymized_result.text, True
+            logger.info(
+                f"Batch masked {len(texts)} texts: {len(pending)} analyzed, "
+                f"{detected} contained PII"
+            )
+            return masked
 
-            return text, False
+        except Exception as e:
+            logger.error(f"Error in batch PII masking: {str(e)}")
+            # Return original texts if masking fails (fail-safe, as mask_pii)
+            return [(text, False) for text in texts]
+
+    async def amask_pii(self, text: str) -> tuple[str, bool]:
+        """
+        Async variant of mask_pii that runs on the bounded masking executor
+
+        With a worker pool the text is awaited on the pool directly, so no
+        thread is tied up per in-flight message.
+
+        Returns:
+            tuple: (masked_text, pii_detected)
+        """
+        loop = asyncio.get_running_loop()
+        if self.pool is None:
+            return await loop.run_in_executor(self.executor, self.mask_pii, text)
+
+        try:
+            if not self._needs_analysis(text):
+                return text, False
+
+            future = await self.pool.asubmit(text, settings.PII_PROCESS_QUEUE_TIMEOUT)
+            if future is not None:
+                return self._pool_result(await future)
+            logger.warning("PII worker pool saturated - masking in-process")
+            return await loop.run_in_executor(self.executor, self._mask_local, text)
 
         except Exception as e:
             logger.error(f"Error in PII masking: {str(e)}")
             # Return original text if masking fails (fail-safe)
             return text, False
 
+    def stats(self) -> dict:
+        """How often the pre-screen let a message skip full analysis"""
+        with self._counts_lock:
+            counts = dict(self._counts)
+        skipped = counts.pop("skipped", 0)
+        analyzed = counts.pop("analyzed", 0)
+        total = skipped + analyzed
+        return {
+            "strict_mode": self.strict,
+            "messages": total,
+            "skipped": skipped,
+            "analyzed": analyzed,
+            "skip_rate": round(skipped / total, 3) if total else 0.0,
+            "signals": {key.split(":", 1)[1]: n for key, n in counts.items()},
+            "process_pool": self.pool.stats() if self.pool is not None else None,
+        }
+
+    def close(self) -> None:
+        """Stop the worker processes, if any"""
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.executor.shutdown(wait=False)
+
     def get_detected_entities(self, text: str) -> list[str]:
         """Get list of detected PII entity types"""
         try:
@@ -66,5 +520,22 @@ class PIIMasker:
             return []
 
 
-# Singleton instance
-pii_masker = PIIMasker()
+# Shared instance, built on first use or by the startup warm-up
+_pii_masker = LazySingleton("pii_masker", PIIMasker)
+
+
+def get_pii_masker() -> PIIMasker:
+    """Shared PIIMasker; the first call loads the spaCy model"""
+    return _pii_masker.get()
+
+
+async def aget_pii_masker() -> PIIMasker:
+    """get_pii_masker for async code; never blocks the event loop on warm-up"""
+    return await _pii_masker.aget()
+
+
+def __getattr__(name: str):
+    # Back-compat: `from modules.pii_masker import pii_masker` still works (and builds it)
+    if name == "pii_masker":
+        return get_pii_masker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
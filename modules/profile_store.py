@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from config.settings import settings
+from modules.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CUSTOMER_ID_PATTERN = re.compile(r"Customer ID:\s*(CUST-\d+)")
+
+
+def parse_profile(text: str) -> dict:
+    """
+    Turn a customer profile text file into structured fields
+
+    "Key: Value" lines become top-level fields (snake_case keys) and
+    bulleted lines under a "Section:" heading become lists.
+    """
+    fields: dict = {}
+    section = None
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+
+        if line.startswith("- ") and section:
+            fields.setdefault(section, []).append(line[2:].strip())
+            continue
+
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+
+        key = re.sub(r"\W+", "_", key.strip().lower()).strip("_")
+        if value.strip():
+            if key == "customer_profile":
+                key = "name"
+            fields[key] = value.strip()
+            section = None
+        else:
+            section = key
+
+    return fields
+
+
+class ProfileStore:
+    """
+    customer_id -> profile lookup backed by a small SQLite file
+
+    Profiles are written by scripts/index_customer_data.py and read through
+    an in-memory LRU, so known customers never need a vector search to find
+    their profile. The cache is dropped whenever the file changes on disk
+    (e.g. a re-index from another process).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS profiles (
+            customer_id TEXT PRIMARY KEY,
+            name TEXT,
+            profile TEXT NOT NULL,
+            fields TEXT NOT NULL,
+            source TEXT,
+            updated_at REAL NOT NULL
+        )
+    """
+
+    def __init__(
+        self,
+        db_path: str = settings.PROFILE_DB_PATH,
+        cache_size: int = settings.PROFILE_CACHE_SIZE,
+    ):
+        self.db_path = db_path
+        self.cache = LRUCache(cache_size)
+        self._local = threading.local()
+        self._generation = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @property
+    def generation(self) -> Optional[int]:
+        """Changes every time the profile file is written"""
+        try:
+            return os.stat(self.db_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _check_generation(self) -> None:
+        generation = self.generation
+        if generation != self._generation:
+            self.cache.clear()
+            self._generation = generation
+
+    def get(self, customer_id: str) -> Optional[dict]:
+        """
+        Look up a customer profile
+
+        Returns:
+            dict: {"customer_id", "name", "profile", "fields"} or None
+        """
+        self._check_generation()
+        if self._generation is None:
+            return None
+
+        cached = self.cache.get(customer_id)
+        if cached is not None:
+            return cached or None
+
+        row = (
+            self._connect()
+            .execute(
+                "SELECT customer_id, name, profile, fields FROM profiles "
+                "WHERE customer_id = ?",
+                (customer_id,),
+            )
+            .fetchone()
+        )
+
+        # Cache misses too ({}), so unknown customers skip the lookup as well
+        profile = (
+            {
+                "customer_id": row["customer_id"],
+                "name": row["name"],
+                "profile": row["profile"],
+                "fields": json.loads(row["fields"]),
+            }
+            if row
+            else {}
+        )
+        self.cache.put(customer_id, profile)
+        return profile or None
+
+    def upsert(self, text: str, source: Optional[str] = None) -> Optional[str]:
+        """Store a profile text; returns its customer_id (None if it has none)"""
+        match = CUSTOMER_ID_PATTERN.search(text)
+        if not match:
+            return None
+
+        customer_id = match.group(1)
+        fields = parse_profile(text)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO profiles "
+                "(customer_id, name, profile, fields, source, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(customer_id) DO UPDATE SET name = excluded.name, "
+                "profile = excluded.profile, fields = excluded.fields, "
+                "source = excluded.source, updated_at = excluded.updated_at",
+                (
+                    customer_id,
+                    fields.get("name"),
+                    text.strip(),
+                    json.dumps(fields),
+                    source,
+                    time.time(),
+                ),
+            )
+        self.cache.pop(customer_id)
+        return customer_id
+
+    def build_from_directory(self, directory_path: str) -> int:
+        """
+        Index every .txt profile under a directory; returns the count
+
+        Profiles whose source file is gone from the directory are removed.
+        """
+        count = 0
+        sources = set()
+        for path in sorted(Path(directory_path).rglob("*.txt")):
+            sources.add(str(path))
+            customer_id = self.upsert(path.read_text(encoding="utf-8"), str(path))
+            if customer_id:
+                count += 1
+            else:
+                logger.warning(f"No Customer ID found in {path}, skipped")
+
+        with self._connect() as conn:
+            prefix = str(Path(directory_path)) + os.sep
+            stale = [
+                row["customer_id"]
+                for row in conn.execute("SELECT customer_id, source FROM profiles")
+                if row["source"]
+                and row["source"].startswith(prefix)
+                and row["source"] not in sources
+            ]
+            conn.executemany(
+                "DELETE FROM profiles WHERE customer_id = ?", [(c,) for c in stale]
+            )
+        for customer_id in stale:
+            self.cache.pop(customer_id)
+        if stale:
+            logger.info(f"Removed {len(stale)} profiles whose files are gone")
+
+        logger.info(f"✅ Profile index holds {count} profiles from {directory_path}")
+        return count
+
+    def __len__(self) -> int:
+        if self.generation is None:
+            return 0
+        return self._connect().execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
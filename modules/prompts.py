@@ -18,3 +18,25 @@ If you don't have information, just say so - don't make it up.
 
 Keep it short, friendly, and helpful!
 """
+
+CUSTOMER_PROFILE_CONTEXT = """=== CUSTOMER PROFILE FOR {customer_id} ===
+{context}
+
+Use this information naturally in your responses. Reference their favorites, habits, and loyalty status as if you remember them from previous visits."""
+
+NEW_CUSTOMER_CONTEXT = """Note: This is a new customer ({customer_id}). Provide general helpful information and offer to help them discover our menu and loyalty program."""
+
+RETRIEVED_CONTEXT = """=== RELEVANT INFORMATION FOR THIS QUESTION ===
+{context}
+
+Use this to answer the customer's next message if it helps."""
+
+CONVERSATION_SUMMARY_PROMPT = """Update the running summary of a customer support chat.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{transcript}
+
+Write the updated summary in 3-5 short sentences. Keep customer preferences, orders and open questions; drop small talk."""
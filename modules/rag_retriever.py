@@ -1,27 +1,84 @@
 import logging
 import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, Optional
 
 from langchain_chroma import Chroma
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_ollama import OllamaEmbeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from config.settings import settings
+from modules.embedding_batcher import EmbeddingCoalescer
+from modules.embedding_cache import CachedQueryEmbeddings
+from modules.index_manifest import IndexManifest
+from modules.lazy import LazySingleton
+from modules.profile_store import CUSTOMER_ID_PATTERN, ProfileStore
+from modules.timing import span
 
 logger = logging.getLogger(__name__)
 
+DOC_TYPE_CUSTOMER_PROFILE = "customer_profile"
+DOC_TYPE_BUSINESS_INFO = "business_info"
+
+# Messages made only of these words never need a business-info lookup
+SMALL_TALK_WORDS = frozenset(
+    """
+    a again awesome bye cheers cool eva good goodbye got great ha haha hello
+    hey hi it k later lol lot much nice no nope ok okay perfect see so sounds
+    sure thank thanks thx ty ya yep yes you
+    """.split()
+)
+
+
+def needs_business_lookup(query: str) -> bool:
+    """False for pure small talk ("thanks!", "ok cool"), True otherwise"""
+    words = re.findall(r"[a-z']+", query.lower())
+    return any(word not in SMALL_TALK_WORDS for word in words)
+
 
 class RAGRetriever:
     """Handle document retrieval using ChromaDB"""
 
-    def __init__(self):
+    def __init__(self, embeddings: Optional[Embeddings] = None):
+        """
+        Args:
+            embeddings: Stand-in for OllamaEmbeddings (benchmarks, offline tests)
+        """
         # Initialize attributes first (always!)
         self.vectorstore = None
         self.embeddings = None
+        self.embedding_batcher = None
+        self.profile_store = ProfileStore()
+        self.manifest = IndexManifest(
+            os.path.join(settings.CHROMA_DB_PATH, "index_manifest.json")
+        )
+        self._version_mtime = None
+        self._versions: dict[str, str] = {}
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.CHUNK_SIZE, chunk_overlap=settings.CHUNK_OVERLAP
+        )
 
         try:
-            # Use Ollama embeddings
-            self.embeddings = OllamaEmbeddings(model="llama3.1")
-            logger.info("✅ Embeddings initialized (Ollama)")
+            # Use Ollama embeddings, with repeated queries served from cache
+            if embeddings is None:
+                embeddings = OllamaEmbeddings(model=settings.EMBEDDING_MODEL)
+                model_name = settings.EMBEDDING_MODEL
+            else:
+                model_name = type(embeddings).__name__
+            # Cache misses from concurrent requests share one Ollama call
+            if settings.EMBEDDING_BATCH_MAX_SIZE > 1:
+                self.embedding_batcher = EmbeddingCoalescer(embeddings)
+                embeddings = self.embedding_batcher
+            self.embeddings = CachedQueryEmbeddings(
+                embeddings,
+                model_name=model_name,
+                disk_path=settings.EMBEDDING_CACHE_PATH,
+            )
+            logger.info("✅ Embeddings initialized (Ollama, query cache enabled)")
 
             # Load existing vector store if available
             if os.path.exists(settings.CHROMA_DB_PATH):
@@ -41,6 +98,13 @@ class RAGRetriever:
                 "⚠️  RAG disabled - chatbot will work without personalization"
             )
 
+    @staticmethod
+    def format_docs(docs, profile: Optional[dict] = None) -> str:
+        """Join the profile and retrieved documents into a numbered context block"""
+        texts = [profile["profile"]] if profile else []
+        texts += [doc.page_content for doc in docs]
+        return "\n\n".join(f"Context {i}: {text}" for i, text in enumerate(texts, 1))
+
     def retrieve_context(self, query: str, top_k: int = 3) -> tuple[str, bool]:
         """
         Retrieve relevant customer context (general search)
@@ -55,13 +119,34 @@ class RAGRetriever:
             docs = self.vectorstore.similarity_search(query, k=top_k)
 
             if docs:
-                context_parts = []
-                for i, doc in enumerate(docs, 1):
-                    context_parts.append(f"Context {i}: {doc.page_content}")
+                logger.info(f"Retrieved {len(docs)} relevant documents")
+                return self.format_docs(docs), True
+
+            return "", False
+
+        except Exception as e:
+            logger.error(f"Error retrieving context: {str(e)}")
+            return "", False
+
+    async def aretrieve_context(self, query: str, top_k: int = 3) -> tuple[str, bool]:
+        """
+        Async variant of retrieve_context (non-blocking query embedding)
+
+        Returns:
+            tuple: (context_string, context_found)
+        """
+        if not self.vectorstore:
+            return "", False
+
+        try:
+            embedding = await self.embeddings.aembed_query(query)
+            docs = await self.vectorstore.asimilarity_search_by_vector(
+                embedding, k=top_k
+            )
 
-                context = "\n\n".join(context_parts)
+            if docs:
                 logger.info(f"Retrieved {len(docs)} relevant documents")
-                return context, True
+                return self.format_docs(docs), True
 
             return "", False
 
@@ -69,16 +154,110 @@ class RAGRetriever:
             logger.error(f"Error retrieving context: {str(e)}")
             return "", False
 
+    @staticmethod
+    def _customer_filter(customer_id: str, profile: Optional[dict] = None) -> dict:
+        """Chroma `where` clause: this customer's docs plus shared business info"""
+        if profile:
+            # Profile already resolved by key lookup - only search business info
+            return {"doc_type": DOC_TYPE_BUSINESS_INFO}
+        return {
+            "$or": [
+                {"customer_id": customer_id},
+                {"doc_type": DOC_TYPE_BUSINESS_INFO},
+            ]
+        }
+
+    @staticmethod
+    def _customer_first(customer_id: str, docs: list[Document]) -> list[Document]:
+        """Order filtered results with the customer's own docs first"""
+        customer_docs = [
+            doc for doc in docs if doc.metadata.get("customer_id") == customer_id
+        ]
+        other_docs = [doc for doc in docs if doc not in customer_docs]
+
+        logger.info(
+            f"Retrieved {len(customer_docs)} customer + {len(other_docs)} "
+            f"business documents for customer {customer_id}"
+        )
+        return customer_docs + other_docs
+
+    def search_customer_docs(
+        self,
+        customer_id: str,
+        query: str,
+        profile: Optional[dict] = None,
+        top_k: int = 3,
+    ) -> list[Document]:
+        """
+        Vector search over this customer's docs and shared business info
+
+        Only business info is searched when the profile is already known.
+        Errors propagate to the caller.
+        """
+        with span("embedding"):
+            embedding = self.embeddings.embed_query(query)
+        # Without a profile the search also has to cover the customer's docs
+        with span("vector_search" if profile else "fallback_search"):
+            docs = self.vectorstore.similarity_search_by_vector(
+                embedding, k=top_k, filter=self._customer_filter(customer_id, profile)
+            )
+        return self._customer_first(customer_id, docs)
+
+    async def asearch_customer_docs(
+        self,
+        customer_id: str,
+        query: str,
+        profile: Optional[dict] = None,
+        top_k: int = 3,
+    ) -> list[Document]:
+        """Async variant of search_customer_docs"""
+        with span("embedding"):
+            embedding = await self.embeddings.aembed_query(query)
+        with span("vector_search" if profile else "fallback_search"):
+            docs = await self.vectorstore.asimilarity_search_by_vector(
+                embedding, k=top_k, filter=self._customer_filter(customer_id, profile)
+            )
+        return self._customer_first(customer_id, docs)
+
+    def _customer_result(
+        self, customer_id: str, docs, profile: Optional[dict] = None
+    ) -> tuple[str, bool]:
+        """Format the profile and ordered search results as one context block"""
+        if profile:
+            logger.info(
+                f"Profile lookup hit for {customer_id} + {len(docs)} business documents"
+            )
+            return self.format_docs(docs, profile), True
+
+        if not docs:
+            logger.info(f"No context found for customer {customer_id}")
+            return "", False
+
+        return self.format_docs(docs), True
+
     def retrieve_customer_context(
-        self, customer_id: str, query: str, top_k: int = 3
+        self,
+        customer_id: str,
+        query: str,
+        top_k: int = 3,
+        profile: Optional[dict] = None,
+        search: bool = True,
     ) -> tuple[str, bool]:
         """
         Retrieve context specific to a customer
 
+        Known customers get their profile from the key-value profile store
+        and the vector search only covers business info. Otherwise a single
+        vector query is restricted (via Chroma metadata) to the customer's
+        own documents and shared business info, so its cost does not depend
+        on how many other customers are indexed.
+
         Args:
             customer_id: Customer identifier (e.g., "CUST-001")
             query: Search query
             top_k: Number of results to retrieve
+            profile: Profile the caller already resolved (looked up if None)
+            search: False skips the vector search, e.g. for small talk
 
         Returns:
             tuple: (context_string, context_found)
@@ -88,42 +267,169 @@ class RAGRetriever:
             return "", False
 
         try:
-            # Try to search with customer_id in the content
-            customer_query = f"{customer_id} {query}"
-            docs = self.vectorstore.similarity_search(customer_query, k=top_k)
-
-            # Filter docs that actually contain the customer_id
-            customer_docs = [doc for doc in docs if customer_id in doc.page_content]
-
-            # If we found customer-specific docs, use them
-            if customer_docs:
-                context_parts = []
-                for i, doc in enumerate(customer_docs, 1):
-                    context_parts.append(f"Context {i}: {doc.page_content}")
-
-                context = "\n\n".join(context_parts)
-                logger.info(
-                    f"Retrieved {len(customer_docs)} documents for customer {customer_id}"
-                )
-                return context, True
+            profile = profile or self.profile_store.get(customer_id)
+            docs = (
+                self.search_customer_docs(customer_id, query, profile, top_k)
+                if search
+                else []
+            )
+            return self._customer_result(customer_id, docs, profile)
 
-            # If no customer-specific results, do general search
-            logger.info(
-                f"No customer-specific data for {customer_id}, doing general search"
+        except Exception as e:
+            logger.error(f"Error retrieving customer context: {str(e)}")
+            return "", False
+
+    async def aretrieve_customer_context(
+        self,
+        customer_id: str,
+        query: str,
+        top_k: int = 3,
+        profile: Optional[dict] = None,
+        search: bool = True,
+    ) -> tuple[str, bool]:
+        """
+        Async variant of retrieve_customer_context
+
+        Args:
+            customer_id: Customer identifier (e.g., "CUST-001")
+            query: Search query
+            top_k: Number of results to retrieve
+            profile: Profile the caller already resolved (looked up if None)
+            search: False skips the vector search, e.g. for small talk
+
+        Returns:
+            tuple: (context_string, context_found)
+        """
+        if not self.vectorstore:
+            logger.warning("Vectorstore not initialized")
+            return "", False
+
+        try:
+            profile = profile or self.profile_store.get(customer_id)
+            docs = (
+                await self.asearch_customer_docs(customer_id, query, profile, top_k)
+                if search
+                else []
             )
-            return self.retrieve_context(query, top_k)
+            return self._customer_result(customer_id, docs, profile)
 
         except Exception as e:
             logger.error(f"Error retrieving customer context: {str(e)}")
             return "", False
 
-    def index_documents(self, directory_path: str, append: bool = True) -> bool:
+    def index_version(self, doc_type: str) -> Optional[str]:
+        """
+        Fingerprint of the indexed content of one doc_type
+
+        Read from the manifest file, so re-indexes done by another process
+        (scripts/index_customer_data.py) are picked up too.
+        """
+        try:
+            mtime = os.stat(self.manifest.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        if mtime != self._version_mtime:
+            self._versions = {}
+            self._version_mtime = mtime
+        if doc_type not in self._versions:
+            self._versions[doc_type] = IndexManifest(self.manifest.path).fingerprint(
+                doc_type
+            )
+        return self._versions[doc_type]
+
+    @staticmethod
+    def _tag_documents(documents, doc_type: Optional[str]) -> None:
+        """Attach customer_id / doc_type metadata used for filtered retrieval"""
+        for doc in documents:
+            match = CUSTOMER_ID_PATTERN.search(doc.page_content)
+            if match:
+                doc.metadata["customer_id"] = match.group(1)
+            doc.metadata["doc_type"] = doc_type or (
+                DOC_TYPE_CUSTOMER_PROFILE if match else DOC_TYPE_BUSINESS_INFO
+            )
+
+    @staticmethod
+    def _discover_files(directory_path: str) -> Iterator[str]:
+        """Yield .txt files lazily so huge directories are never listed up front"""
+        for root, dirs, files in os.walk(directory_path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".txt"):
+                    yield os.path.join(root, name)
+
+    def _load_chunks(
+        self, path: str, text: str, doc_type: Optional[str]
+    ) -> list[Document]:
+        """Tag one file and split it into chunks with stable IDs"""
+        document = Document(page_content=text, metadata={"source": path})
+
+        # Tag before splitting so every chunk inherits customer_id / doc_type
+        self._tag_documents([document], doc_type)
+        chunks = self.text_splitter.split_documents([document])
+        for i, chunk in enumerate(chunks):
+            chunk.metadata["chunk_index"] = i
+            chunk.id = IndexManifest.chunk_id(path, i)
+        return chunks
+
+    def _index_batch(self, chunks: list[Document]) -> int:
+        """Embed and upsert one batch (one embedding request per batch)"""
+        self.vectorstore.add_texts(
+            [chunk.page_content for chunk in chunks],
+            metadatas=[chunk.metadata for chunk in chunks],
+            ids=[chunk.id for chunk in chunks],
+        )
+        return len(chunks)
+
+    def _delete_chunks(self, chunk_ids: list[str]) -> None:
+        if chunk_ids:
+            self.vectorstore.delete(ids=list(chunk_ids))
+
+    def _ensure_vectorstore(self, reset: bool) -> None:
+        if self.vectorstore is None:
+            logger.info("Creating new vectorstore...")
+            self.vectorstore = Chroma(
+                persist_directory=settings.CHROMA_DB_PATH,
+                embedding_function=self.embeddings,
+            )
+        elif reset:
+            logger.info("Replacing existing vectorstore...")
+            self.vectorstore.reset_collection()
+        else:
+            logger.info("Adding to existing vectorstore...")
+
+    def index_documents(
+        self,
+        directory_path: str,
+        append: bool = True,
+        doc_type: Optional[str] = None,
+        batch_size: int = settings.INDEX_BATCH_SIZE,
+        concurrency: int = settings.INDEX_CONCURRENCY,
+        progress: Optional[Callable[[dict], None]] = None,
+    ) -> bool:
         """
         Index documents from directory
 
+        Files are discovered lazily, split into overlapping chunks
+        (CHUNK_SIZE / CHUNK_OVERLAP) and embedded in batches by a pool of
+        `concurrency` workers. At most 2 x concurrency batches are in flight,
+        so memory stays flat however many files there are.
+
+        Indexing is incremental: the manifest skips files whose content hash
+        is unchanged, chunks of edited or deleted files are removed, and
+        chunk IDs are stable so re-runs upsert rather than duplicate.
+
         Args:
             directory_path: Path to documents
-            append: If True, add to existing vectorstore. If False, replace it.
+            append: If True, update the existing vectorstore incrementally.
+                If False, replace it and re-embed everything.
+            doc_type: Metadata doc_type for every file ("customer_profile" or
+                "business_info"); inferred per file from a "Customer ID:"
+                line when omitted.
+            batch_size: Chunks per embedding request
+            concurrency: Embedding requests in flight at once
+            progress: Called after every batch with files/chunks/batches
+                done, elapsed seconds and chunks_per_sec
         """
         try:
             logger.info(f"📚 Starting document indexing from: {directory_path}")
@@ -136,44 +442,126 @@ class RAGRetriever:
                 logger.error("Embeddings not initialized")
                 return False
 
-            # Load documents
-            loader = DirectoryLoader(
-                directory_path, glob="**/*.txt", loader_cls=TextLoader
-            )
-            documents = loader.load()
-
-            if not documents:
+            self._ensure_vectorstore(reset=not append)
+            if not append:
+                self.manifest.clear()
+
+            stats = {
+                "files": 0,
+                "unchanged": 0,
+                "removed": 0,
+                "chunks": 0,
+                "batches": 0,
+            }
+            seen = set()
+            started = time.perf_counter()
+            in_flight = set()
+
+            def collect(done) -> None:
+                for future in done:
+                    in_flight.discard(future)
+                    stats["chunks"] += future.result()
+                    stats["batches"] += 1
+                    elapsed = max(time.perf_counter() - started, 1e-9)
+                    if progress:
+                        progress(
+                            {
+                                **stats,
+                                "elapsed": elapsed,
+                                "chunks_per_sec": stats["chunks"] / elapsed,
+                            }
+                        )
+
+            def submit(batch: list[Document]) -> None:
+                while len(in_flight) >= concurrency * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(pool.submit(self._index_batch, batch))
+
+            with ThreadPoolExecutor(
+                max_workers=concurrency, thread_name_prefix="indexer"
+            ) as pool:
+                batch = []
+                for path in self._discover_files(directory_path):
+                    seen.add(IndexManifest.key(path))
+                    with open(path, encoding="utf-8") as f:
+                        text = f.read()
+
+                    content_hash = IndexManifest.content_hash(text)
+                    entry = self.manifest.get(path)
+                    if entry and entry["hash"] == content_hash:
+                        stats["unchanged"] += 1
+                        continue
+
+                    chunks = self._load_chunks(path, text, doc_type)
+                    chunk_ids = [chunk.id for chunk in chunks]
+                    if entry:
+                        # Drop chunks the edited file no longer produces
+                        self._delete_chunks(set(entry["chunk_ids"]) - set(chunk_ids))
+                    self.manifest.set(
+                        path,
+                        content_hash,
+                        chunk_ids,
+                        chunks[0].metadata["doc_type"] if chunks else doc_type,
+                    )
+
+                    batch.extend(chunks)
+                    stats["files"] += 1
+                    while len(batch) >= batch_size:
+                        submit(batch[:batch_size])
+                        batch = batch[batch_size:]
+                if batch:
+                    submit(batch)
+                collect(wait(in_flight)[0])
+
+            # Files that disappeared since the last run
+            for path in self.manifest.paths_under(directory_path):
+                if path not in seen:
+                    self._delete_chunks(self.manifest.remove(path))
+                    stats["removed"] += 1
+
+            # Only persist once every batch made it into the vectorstore
+            self.manifest.save()
+
+            if not seen:
                 logger.warning(f"No .txt files found in {directory_path}")
                 return False
 
-            logger.info(f"Found {len(documents)} documents to index")
-
-            # Create or append to vector store
-            if append and self.vectorstore:
-                # Add to existing vectorstore
-                logger.info("Adding to existing vectorstore...")
-                self.vectorstore.add_documents(documents)
-                # No need to call persist() - langchain-chroma auto-persists
-            else:
-                # Create new vectorstore
-                logger.info("Creating new vectorstore...")
-                self.vectorstore = Chroma.from_documents(
-                    documents=documents,
-                    embedding=self.embeddings,
-                    persist_directory=settings.CHROMA_DB_PATH,
-                )
-                # No need to call persist() - langchain-chroma auto-persists
-
-            logger.info(f"✅ Indexed {len(documents)} documents successfully")
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            logger.info(
+                f"✅ Indexed {stats['files']} new/changed files as "
+                f"{stats['chunks']} chunks in {elapsed:.1f}s "
+                f"({stats['chunks'] / elapsed:.1f} chunks/s); "
+                f"{stats['unchanged']} unchanged, {stats['removed']} removed"
+            )
             return True
 
         except Exception as e:
             logger.error(f"❌ Error indexing documents: {str(e)}")
+            # Forget unsaved manifest edits so the next run retries those files
+            self.manifest = IndexManifest(self.manifest.path)
             import traceback
 
             traceback.print_exc()
             return False
 
 
-# Singleton instance
-rag_retriever = RAGRetriever()
+# Shared instance, built on first use or by the startup warm-up
+_rag_retriever = LazySingleton("rag_retriever", RAGRetriever)
+
+
+def get_rag_retriever() -> RAGRetriever:
+    """Shared RAGRetriever; the first call opens Chroma"""
+    return _rag_retriever.get()
+
+
+async def aget_rag_retriever() -> RAGRetriever:
+    """get_rag_retriever for async code; never blocks the event loop on warm-up"""
+    return await _rag_retriever.aget()
+
+
+def __getattr__(name: str):
+    # Back-compat: `from modules.rag_retriever import rag_retriever` still works (and builds it)
+    if name == "rag_retriever":
+        return get_rag_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
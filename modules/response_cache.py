@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+
+class SemanticResponseCache:
+    """
+    Answers to general questions, looked up by query-embedding similarity
+
+    A lookup returns the stored answer whose question embedding has the
+    highest cosine similarity to the new one, if it clears `threshold`.
+    Entries expire after `ttl_seconds`, the least recently used entry is
+    evicted beyond `maxsize`, and everything is dropped when the caller
+    passes a different `version` (e.g. after business info is re-indexed).
+
+    Answers are only shared between lookups with the same `context` (a
+    fingerprint of the prior conversation), so a follow-up like "how much
+    is it?" never gets an answer written for a different conversation.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.RESPONSE_CACHE_SIZE,
+        ttl_seconds: Optional[float] = settings.RESPONSE_CACHE_TTL_SECONDS,
+        threshold: float = settings.RESPONSE_CACHE_THRESHOLD,
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.version: Optional[Hashable] = None
+
+        # key -> (stored_at, unit vector, question, answer, context)
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+        self._matrix = None  # stacked unit vectors, rebuilt after writes
+        self._contexts = None  # entry contexts, aligned with _matrix rows
+        self._keys: list[int] = []
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: Optional[Hashable]) -> None:
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._matrix = None
+            self.version = version
+
+    def _expired(self, stored_at: float) -> bool:
+        return (
+            self.ttl_seconds is not None
+            and time.monotonic() - stored_at > self.ttl_seconds
+        )
+
+    def get(
+        self,
+        vector,
+        version: Optional[Hashable] = None,
+        context: Optional[Hashable] = None,
+    ) -> Optional[str]:
+        """Return the cached answer for the most similar question, if any"""
+        if not self.enabled:
+            return None
+
+        query = self._unit(vector)
+        with self._lock:
+            self._check_version(version)
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._keys = list(self._entries)
+                self._matrix = np.stack([self._entries[k][1] for k in self._keys])
+                self._contexts = np.empty(len(self._keys), dtype=object)
+                self._contexts[:] = [self._entries[k][4] for k in self._keys]
+
+            if self._matrix.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            scores = np.where(self._contexts == context, self._matrix @ query, -np.inf)
+            best = int(np.argmax(scores))
+            key = self._keys[best]
+            entry = self._entries.get(key)
+
+            if entry is None or scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            if self._expired(entry[0]):
+                del self._entries[key]
+                self._matrix = None
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[3]
+
+    def put(
+        self,
+        vector,
+        question: str,
+        answer: str,
+        version: Optional[Hashable] = None,
+        context: Optional[Hashable] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            self._entries[self._next_key] = (
+                time.monotonic(),
+                self._unit(vector),
+                question,
+                answer,
+                context,
+            )
+            self._next_key += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
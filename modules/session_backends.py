@@ -0,0 +1,666 @@
+import json
+import logging
+import socket
+import sqlite3
+import threading
+import time
+from abc import abstractmethod
+from collections import Counter
+from typing import Optional, Sequence
+from urllib.parse import urlparse
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import (
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+
+from config.settings import settings
+from modules.session_store import (
+    BaseSessionStore,
+    counts_summary,
+    session_customer_id,
+)
+from modules.timing import span
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps(message: BaseMessage) -> str:
+    return json.dumps(message_to_dict(message_chunk_to_message(message)))
+
+
+def _loads(rows: Sequence[str]) -> list[BaseMessage]:
+    return messages_from_dict([json.loads(row) for row in rows])
+
+
+class PersistentSessionHistory(BaseChatMessageHistory):
+    """Chat history view onto a persistent session store"""
+
+    def __init__(self, store: "WriteBehindSessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    @property
+    def messages(self) -> list[BaseMessage]:
+        return self.store.read_messages(self.session_id)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with span("history_write"):
+            self.store.enqueue(self.session_id, messages)
+
+    def clear(self) -> None:
+        self.store.delete(self.session_id)
+
+    def replace_messages(self, messages: Sequence[BaseMessage]) -> bool:
+        """Rewrite the history (memory compaction); message counts are kept"""
+        return self.store.replace(self.session_id, messages)
+
+
+class WriteBehindSessionStore(BaseSessionStore):
+    """
+    Base for persistent session stores
+
+    New messages are buffered per session and written by a background
+    flusher in one batch (one transaction / one pipeline) every
+    SESSION_FLUSH_INTERVAL_MS or as soon as SESSION_FLUSH_BATCH_SIZE
+    messages are pending, so a chat turn never waits on a storage round
+    trip. Reads merge the stored messages with this worker's pending ones.
+
+    Message counts for /analytics live in the backend too, updated in the
+    same flush that writes the messages and decremented when a session is
+    deleted or expires, so every worker sees the same totals.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.SESSION_TTL_SECONDS,
+        flush_interval_ms: int = settings.SESSION_FLUSH_INTERVAL_MS,
+        flush_batch_size: int = settings.SESSION_FLUSH_BATCH_SIZE,
+    ):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_batch_size = flush_batch_size
+
+        self._pending: dict[str, list[str]] = {}
+        self._pending_count = 0
+        # Messages not yet added to the backend counts (survives a rewrite)
+        self._pending_counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+
+        self.metrics = {"batches_flushed": 0, "messages_flushed": 0, "flush_errors": 0}
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name=f"{self.backend}-session-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    # Backend hooks
+
+    @abstractmethod
+    def _write_batch(self, batch: dict[str, list[str]], counts: dict[str, int]) -> None:
+        """
+        Persist {session_id: [serialized messages]} and add {session_id:
+        new message count} to the counts in one transaction / pipeline
+        """
+
+    @abstractmethod
+    def _replace(self, session_id: str, rows: list[str]) -> None:
+        """Overwrite a session's stored messages, leaving its counts alone"""
+
+    @abstractmethod
+    def _read_counts(self) -> dict[str, int]:
+        """Expire idle sessions, then return {customer_id: messages}"""
+
+    @abstractmethod
+    def _read(self, session_id: str) -> list[str]:
+        """Load serialized messages for a session ([] if missing/expired)"""
+
+    @abstractmethod
+    def _exists(self, session_id: str) -> bool: ...
+
+    @abstractmethod
+    def _delete(self, session_id: str) -> bool: ...
+
+    @abstractmethod
+    def _session_ids(self) -> list[str]: ...
+
+    # Store API
+
+    def get_or_create(self, session_id: str) -> PersistentSessionHistory:
+        return PersistentSessionHistory(self, session_id)
+
+    def get(self, session_id: str) -> Optional[PersistentSessionHistory]:
+        with self._lock:
+            pending = session_id in self._pending
+        if pending or self._exists(session_id):
+            return PersistentSessionHistory(self, session_id)
+        return None
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            dropped = self._pending.pop(session_id, [])
+            self._pending_count -= len(dropped)
+            self._pending_counts.pop(session_id, None)
+        # Wait for an in-flight flush so it cannot resurrect the session
+        with self._flush_lock:
+            return self._delete(session_id) or bool(dropped)
+
+    def items(self) -> list[tuple[str, PersistentSessionHistory]]:
+        with self._lock:
+            session_ids = set(self._pending)
+        session_ids.update(self._session_ids())
+        return [(sid, PersistentSessionHistory(self, sid)) for sid in session_ids]
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending_count
+        return {
+            "backend": self.backend,
+            "active_sessions": len(self),
+            "pending_messages": pending,
+            "ttl_seconds": self.ttl_seconds,
+            **self.metrics,
+        }
+
+    def message_counts(self) -> dict:
+        # Under the flush lock, so no batch is counted both here and stored
+        with self._flush_lock:
+            per_customer = Counter(self._read_counts())
+            with self._lock:
+                for session_id, count in self._pending_counts.items():
+                    per_customer[session_customer_id(session_id)] += count
+        return counts_summary(per_customer)
+
+    def replace(self, session_id: str, messages: Sequence[BaseMessage]) -> bool:
+        """
+        Rewrite a session's history, including this worker's pending
+        messages (which `messages` must already contain)
+
+        Returns:
+            bool: False if the session is gone or the write failed
+        """
+        rows = [_dumps(m) for m in messages]
+        with self._flush_lock:
+            with self._lock:
+                dropped = self._pending.pop(session_id, [])
+                self._pending_count -= len(dropped)
+            try:
+                if not dropped and not self._exists(session_id):
+                    return False
+                self._replace(session_id, rows)
+                return True
+            except Exception as e:
+                logger.error(f"Session rewrite failed for {session_id}: {str(e)}")
+                with self._lock:
+                    self._pending[session_id] = dropped + self._pending.get(
+                        session_id, []
+                    )
+                    self._pending_count += len(dropped)
+                return False
+
+    def read_messages(self, session_id: str) -> list[BaseMessage]:
+        with self._lock:
+            pending = list(self._pending.get(session_id, []))
+        return _loads(self._read(session_id) + pending)
+
+    def enqueue(self, session_id: str, messages: Sequence[BaseMessage]) -> None:
+        rows = [_dumps(m) for m in messages]
+        with self._lock:
+            self._pending.setdefault(session_id, []).extend(rows)
+            self._pending_count += len(rows)
+            self._pending_counts[session_id] += len(rows)
+            full = self._pending_count >= self.flush_batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """Write all pending messages now"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                counts, self._pending_counts = self._pending_counts, Counter()
+                self._pending_count = 0
+            if not batch and not counts:
+                return
+            try:
+                self._write_batch(batch, counts)
+                self.metrics["batches_flushed"] += 1
+                self.metrics["messages_flushed"] += sum(map(len, batch.values()))
+            except Exception as e:
+                self.metrics["flush_errors"] += 1
+                logger.error(f"Session flush failed, will retry: {str(e)}")
+                with self._lock:
+                    for session_id, rows in batch.items():
+                        self._pending[session_id] = rows + self._pending.get(
+                            session_id, []
+                        )
+                        self._pending_count += len(rows)
+                    self._pending_counts.update(counts)
+
+    def close(self) -> None:
+        self._closed.set()
+        self._wakeup.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+class SQLiteSessionStore(WriteBehindSessionStore):
+    """Session store in a WAL-mode SQLite file shared by all local workers"""
+
+    backend = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            message TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+        CREATE TABLE IF NOT EXISTS session_counts (
+            session_id TEXT PRIMARY KEY,
+            messages INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS customer_counts (
+            customer_id TEXT PRIMARY KEY,
+            messages INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str, **kwargs):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            self._backfill_counts(conn)
+        logger.info(f"SQLite session store at {db_path}")
+        super().__init__(**kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_seconds
+
+    @staticmethod
+    def _backfill_counts(conn: sqlite3.Connection) -> None:
+        """Count sessions written before the count tables existed"""
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM session_counts LIMIT 1").fetchone():
+            return
+        rows = conn.execute(
+            "SELECT session_id, COUNT(*) FROM messages GROUP BY session_id"
+        ).fetchall()
+        if rows:
+            SQLiteSessionStore._add_counts(conn, dict(rows))
+
+    @staticmethod
+    def _add_counts(conn: sqlite3.Connection, counts: dict[str, int]) -> None:
+        conn.executemany(
+            "INSERT INTO session_counts (session_id, messages) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET messages = messages + excluded.messages",
+            counts.items(),
+        )
+        per_customer = Counter()
+        for session_id, count in counts.items():
+            per_customer[session_customer_id(session_id)] += count
+        conn.executemany(
+            "INSERT INTO customer_counts (customer_id, messages) VALUES (?, ?) "
+            "ON CONFLICT(customer_id) DO UPDATE SET messages = messages + excluded.messages",
+            per_customer.items(),
+        )
+
+    @staticmethod
+    def _forget(conn: sqlite3.Connection, session_id: str) -> bool:
+        """Drop a session, its messages and its share of the counts"""
+        row = conn.execute(
+            "DELETE FROM session_counts WHERE session_id = ? RETURNING messages",
+            (session_id,),
+        ).fetchall()
+        if row:
+            conn.execute(
+                "UPDATE customer_counts SET messages = messages - ? "
+                "WHERE customer_id = ?",
+                (row[0][0], session_customer_id(session_id)),
+            )
+        conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        cursor = conn.execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+        )
+        return cursor.rowcount > 0
+
+    def _expire(self, conn: sqlite3.Connection) -> None:
+        expired = conn.execute(
+            "SELECT session_id FROM sessions WHERE updated_at < ?",
+            (self._cutoff(),),
+        ).fetchall()
+        for (session_id,) in expired:
+            self._forget(conn, session_id)
+        if expired:
+            conn.execute("DELETE FROM customer_counts WHERE messages <= 0")
+
+    def _write_batch(self, batch: dict[str, list[str]], counts: dict[str, int]) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO messages (session_id, message) VALUES (?, ?)",
+                [(sid, row) for sid, rows in batch.items() for row in rows],
+            )
+            conn.executemany(
+                "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                [(sid, now) for sid in batch.keys() | counts.keys()],
+            )
+            self._add_counts(conn, counts)
+            # Expire idle sessions in the same transaction
+            self._expire(conn)
+
+    def _replace(self, session_id: str, rows: list[str]) -> None:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.executemany(
+                "INSERT INTO messages (session_id, message) VALUES (?, ?)",
+                [(session_id, row) for row in rows],
+            )
+            conn.execute(
+                "INSERT INTO sessions (session_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session_id, time.time()),
+            )
+
+    def _read_counts(self) -> dict[str, int]:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire(conn)
+            rows = conn.execute(
+                "SELECT customer_id, messages FROM customer_counts"
+            ).fetchall()
+        return dict(rows)
+
+    def _read(self, session_id: str) -> list[str]:
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT m.message FROM messages m JOIN sessions s "
+                "ON s.session_id = m.session_id "
+                "WHERE m.session_id = ? AND s.updated_at >= ? ORDER BY m.id",
+                (session_id, self._cutoff()),
+            )
+            .fetchall()
+        )
+        return [row[0] for row in rows]
+
+    def _exists(self, session_id: str) -> bool:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, self._cutoff()),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def _delete(self, session_id: str) -> bool:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = self._forget(conn, session_id)
+            conn.execute("DELETE FROM customer_counts WHERE messages <= 0")
+        return deleted
+
+    def _session_ids(self) -> list[str]:
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT session_id FROM sessions WHERE updated_at >= ?",
+                (self._cutoff(),),
+            )
+            .fetchall()
+        )
+        return [row[0] for row in rows]
+
+    def __len__(self) -> int:
+        return (
+            self._connect()
+            .execute(
+                "SELECT COUNT(*) FROM sessions WHERE updated_at >= ?",
+                (self._cutoff(),),
+            )
+            .fetchone()[0]
+        )
+
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+
+
+class RespClient:
+    """Minimal RESP2 client (just enough for the session store)"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), self.timeout)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._roundtrip([("AUTH", self.password)])
+        if self.db:
+            self._roundtrip([("SELECT", self.db)])
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            return RespError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = self._file.read(size + 2)[:-2]
+            return data.decode()
+        if kind == b"*":
+            size = int(body)
+            if size < 0:
+                return None
+            return [self._read_reply() for _ in range(size)]
+        raise RespError(f"Unknown reply type: {line!r}")
+
+    def _roundtrip(self, commands: list[tuple]) -> list:
+        self._sock.sendall(b"".join(self._encode(cmd) for cmd in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def pipeline(self, commands: list[tuple]) -> list:
+        """Send several commands in one round trip"""
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                return self._roundtrip(commands)
+            except (OSError, ConnectionError):
+                # Reconnect once on a dropped connection
+                self.close()
+                self._connect()
+                return self._roundtrip(commands)
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._file = None
+
+
+class RedisSessionStore(WriteBehindSessionStore):
+    """Session store on any Redis-protocol server (Redis, Valkey, KeyDB...)"""
+
+    backend = "redis"
+
+    def __init__(self, url: str, prefix: str = "eva:", **kwargs):
+        self.client = RespClient(url)
+        self.prefix = prefix
+        self.index_key = f"{prefix}sessions"
+        self.session_counts_key = f"{prefix}session_counts"
+        self.customer_counts_key = f"{prefix}customer_counts"
+        self.client.execute("PING")
+        logger.info(f"Redis session store at {url}")
+        super().__init__(**kwargs)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}session:{session_id}"
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_seconds
+
+    def _write_batch(self, batch: dict[str, list[str]], counts: dict[str, int]) -> None:
+        now = time.time()
+        ttl = max(int(self.ttl_seconds), 1)
+        commands = []
+        for session_id, rows in batch.items():
+            commands.append(("RPUSH", self._key(session_id), *rows))
+            commands.append(("EXPIRE", self._key(session_id), ttl))
+        for session_id in batch.keys() | counts.keys():
+            commands.append(("ZADD", self.index_key, now, session_id))
+        for session_id, count in counts.items():
+            commands.append(("HINCRBY", self.session_counts_key, session_id, count))
+            commands.append(
+                (
+                    "HINCRBY",
+                    self.customer_counts_key,
+                    session_customer_id(session_id),
+                    count,
+                )
+            )
+        # Idle sessions found here are expired (and uncounted) below
+        commands.append(("ZRANGEBYSCORE", self.index_key, "-inf", self._cutoff()))
+        expired = self.client.pipeline(commands)[-1]
+        if expired:
+            self._forget(expired)
+
+    def _forget(self, session_ids: list[str], drop_messages: bool = False) -> bool:
+        """
+        Unindex sessions and subtract their messages from the customer counts
+
+        Expired sessions keep their list key (Redis expires it by TTL). Only
+        the worker whose HDEL removed a session's count subtracts it, so two
+        workers expiring the same session cannot count it out twice.
+
+        Returns:
+            bool: whether anything was removed
+        """
+        commands = []
+        for session_id in session_ids:
+            commands.append(("ZREM", self.index_key, session_id))
+            commands.append(("HGET", self.session_counts_key, session_id))
+            commands.append(("HDEL", self.session_counts_key, session_id))
+            if drop_messages:
+                commands.append(("DEL", self._key(session_id)))
+        replies = self.client.pipeline(commands)
+
+        step = 4 if drop_messages else 3
+        removed = False
+        decrements = []
+        for i, session_id in enumerate(session_ids):
+            unindexed, count, removed_count, *dropped = replies[
+                step * i : step * (i + 1)
+            ]
+            removed = removed or unindexed > 0 or any(n > 0 for n in dropped)
+            if removed_count and count:
+                customer_id = session_customer_id(session_id)
+                decrements.append(
+                    ("HINCRBY", self.customer_counts_key, customer_id, -int(count))
+                )
+        if decrements:
+            self.client.pipeline(decrements)
+        return removed
+
+    def _replace(self, session_id: str, rows: list[str]) -> None:
+        key = self._key(session_id)
+        commands = [("DEL", key)]
+        if rows:
+            commands.append(("RPUSH", key, *rows))
+            commands.append(("EXPIRE", key, max(int(self.ttl_seconds), 1)))
+        commands.append(("ZADD", self.index_key, time.time(), session_id))
+        self.client.pipeline(commands)
+
+    def _read_counts(self) -> dict[str, int]:
+        expired = self.client.execute(
+            "ZRANGEBYSCORE", self.index_key, "-inf", self._cutoff()
+        )
+        if expired:
+            self._forget(expired)
+        flat = self.client.execute("HGETALL", self.customer_counts_key) or []
+        return {flat[i]: int(flat[i + 1]) for i in range(0, len(flat), 2)}
+
+    def _read(self, session_id: str) -> list[str]:
+        return self.client.execute("LRANGE", self._key(session_id), 0, -1) or []
+
+    def _exists(self, session_id: str) -> bool:
+        return bool(self.client.execute("EXISTS", self._key(session_id)))
+
+    def _delete(self, session_id: str) -> bool:
+        return self._forget([session_id], drop_messages=True)
+
+    def _session_ids(self) -> list[str]:
+        return self.client.execute(
+            "ZRANGEBYSCORE", self.index_key, self._cutoff(), "+inf"
+        )
+
+    def __len__(self) -> int:
+        return self.client.execute("ZCOUNT", self.index_key, self._cutoff(), "+inf")
+
+    def close(self) -> None:
+        super().close()
+        self.client.close()
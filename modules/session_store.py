@@ -0,0 +1,322 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Callable, Optional, Sequence
+
+from langchain_community.chat_message_histories import ChatMessageHistory
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from pydantic import PrivateAttr
+
+from config.settings import settings
+from modules.timing import span
+
+logger = logging.getLogger(__name__)
+
+# Rough per-message bookkeeping cost on top of the content itself
+MESSAGE_OVERHEAD_BYTES = 256
+
+
+def estimate_message_bytes(message: BaseMessage) -> int:
+    """Approximate in-memory footprint of a chat message"""
+    return len(str(message.content).encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+
+
+def session_customer_id(session_id: str) -> str:
+    # Session ids are "<customer_id>:<session name>"
+    return session_id.split(":", 1)[0]
+
+
+def counts_summary(per_customer: dict[str, int]) -> dict:
+    """Shape of BaseSessionStore.message_counts()"""
+    per_customer = {c: n for c, n in per_customer.items() if n > 0}
+    return {
+        "total_messages": sum(per_customer.values()),
+        "messages_per_customer": per_customer,
+    }
+
+
+class SessionCounters:
+    """
+    Message totals kept up to date on the history write path
+
+    Used by the in-memory store, whose sessions live in this process only;
+    the persistent backends keep their counts next to the messages. A
+    session's messages are subtracted again when it is deleted or evicted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_session: dict[str, int] = {}
+        self._by_customer: Counter = Counter()
+        self.total_messages = 0
+
+    def add(self, session_id: str, count: int) -> None:
+        with self._lock:
+            self._by_session[session_id] = self._by_session.get(session_id, 0) + count
+            self._by_customer[session_customer_id(session_id)] += count
+            self.total_messages += count
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            count = self._by_session.pop(session_id, 0)
+            customer_id = session_customer_id(session_id)
+            self._by_customer[customer_id] -= count
+            if self._by_customer[customer_id] <= 0:
+                del self._by_customer[customer_id]
+            self.total_messages -= count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return counts_summary(self._by_customer)
+
+
+class SessionHistory(ChatMessageHistory):
+    """ChatMessageHistory that stores streamed AI chunks as complete messages"""
+
+    # (bytes delta, message count delta)
+    _on_change: Optional[Callable[[int, int], None]] = PrivateAttr(default=None)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with span("history_write"):
+            super().add_messages(messages)
+
+    def add_message(self, message: BaseMessage) -> None:
+        message = message_chunk_to_message(message)
+        super().add_message(message)
+        if self._on_change:
+            self._on_change(estimate_message_bytes(message), 1)
+
+    def clear(self) -> None:
+        freed = sum(estimate_message_bytes(m) for m in self.messages)
+        count = len(self.messages)
+        super().clear()
+        if self._on_change:
+            self._on_change(-freed, -count)
+
+    def replace_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Rewrite the history (memory compaction); message counts are kept"""
+        messages = [message_chunk_to_message(m) for m in messages]
+        delta = sum(estimate_message_bytes(m) for m in messages) - sum(
+            estimate_message_bytes(m) for m in self.messages
+        )
+        self.messages = messages
+        if self._on_change:
+            self._on_change(delta, 0)
+
+
+class BaseSessionStore(ABC):
+    """Interface used by ChatbotHandler and the API for session histories"""
+
+    backend = "base"
+
+    @abstractmethod
+    def get_or_create(self, session_id: str) -> BaseChatMessageHistory:
+        """Return the history for a session, creating it if needed"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[BaseChatMessageHistory]:
+        """Return an existing history or None"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Drop a session; returns False if it did not exist"""
+
+    @abstractmethod
+    def items(self) -> list[tuple[str, BaseChatMessageHistory]]:
+        """Snapshot of (session_id, history) pairs"""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Backend size and activity counters"""
+
+    @abstractmethod
+    def message_counts(self) -> dict:
+        """
+        Messages per customer across every live session in the backend
+
+        Returns:
+            dict: {"total_messages": int, "messages_per_customer": dict}
+        """
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def close(self) -> None:
+        """Flush pending writes and release resources"""
+
+
+class InMemorySessionStore(BaseSessionStore):
+    """
+    Bounded in-process session store
+
+    Sessions are kept in LRU order and evicted when they sit idle longer
+    than the TTL, when the session count exceeds max_sessions, or when the
+    approximate memory used by all histories exceeds the memory cap.
+    Only suitable for single-worker deployments.
+    """
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        max_sessions: int = settings.SESSION_MAX_SESSIONS,
+        ttl_seconds: float = settings.SESSION_TTL_SECONDS,
+        max_memory_bytes: int = settings.SESSION_MAX_MEMORY_MB * 1024 * 1024,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+
+        self._sessions: OrderedDict[str, SessionHistory] = OrderedDict()
+        self._last_access: dict[str, float] = {}
+        self._sizes: dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.counters = SessionCounters()
+
+        self.metrics = {
+            "sessions_created": 0,
+            "evicted_lru": 0,
+            "evicted_ttl": 0,
+            "evicted_memory": 0,
+        }
+
+    def get_or_create(self, session_id: str) -> SessionHistory:
+        """Return the history for a session, creating it if needed"""
+        with self._lock:
+            self._evict_expired()
+
+            history = self._sessions.get(session_id)
+            if history is None:
+                history = SessionHistory()
+                history._on_change = lambda delta, messages: self._on_change(
+                    session_id, delta, messages
+                )
+                self._sessions[session_id] = history
+                self._sizes[session_id] = 0
+                self.metrics["sessions_created"] += 1
+                logger.info(f"Created new session: {session_id}")
+                self._evict_over_capacity(keep=session_id)
+            else:
+                self._sessions.move_to_end(session_id)
+
+            self._last_access[session_id] = time.monotonic()
+            return history
+
+    def get(self, session_id: str) -> Optional[SessionHistory]:
+        """Return an existing history without refreshing its LRU position"""
+        with self._lock:
+            self._evict_expired()
+            return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session; returns False if it did not exist"""
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            return True
+
+    def items(self) -> list[tuple[str, SessionHistory]]:
+        """Snapshot of (session_id, history) pairs"""
+        with self._lock:
+            self._evict_expired()
+            return list(self._sessions.items())
+
+    def stats(self) -> dict:
+        """Current size and eviction counters"""
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "active_sessions": len(self._sessions),
+                "approx_memory_bytes": self._total_bytes,
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_memory_bytes": self.max_memory_bytes,
+                **self.metrics,
+            }
+
+    def message_counts(self) -> dict:
+        with self._lock:
+            self._evict_expired()
+            return self.counters.snapshot()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired()
+            return len(self._sessions)
+
+    def _on_change(self, session_id: str, delta: int, messages: int) -> None:
+        with self._lock:
+            if session_id not in self._sessions:
+                return
+            if messages < 0:
+                self.counters.remove(session_id)
+            elif messages > 0:
+                self.counters.add(session_id, messages)
+            self._sizes[session_id] += delta
+            self._total_bytes += delta
+            self._sessions.move_to_end(session_id)
+            self._last_access[session_id] = time.monotonic()
+            self._evict_over_capacity(keep=session_id)
+
+    def _remove(self, session_id: str) -> None:
+        history = self._sessions.pop(session_id)
+        history._on_change = None
+        self.counters.remove(session_id)
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+        self._last_access.pop(session_id, None)
+
+    def _evict_expired(self) -> None:
+        # LRU order means the oldest idle sessions are always at the front
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            session_id = next(iter(self._sessions))
+            if self._last_access.get(session_id, 0) > cutoff:
+                break
+            self._remove(session_id)
+            self.metrics["evicted_ttl"] += 1
+            logger.info(f"Evicted idle session: {session_id}")
+
+    def _evict_over_capacity(self, keep: str) -> None:
+        while len(self._sessions) > self.max_sessions:
+            if not self._evict_lru(keep, "evicted_lru"):
+                break
+        while self._total_bytes > self.max_memory_bytes:
+            if not self._evict_lru(keep, "evicted_memory"):
+                break
+
+    def _evict_lru(self, keep: str, reason: str) -> bool:
+        for session_id in self._sessions:
+            if session_id != keep:
+                self._remove(session_id)
+                self.metrics[reason] += 1
+                logger.info(f"Evicted session ({reason}): {session_id}")
+                return True
+        return False
+
+
+def create_session_store(backend: str = settings.SESSION_BACKEND) -> BaseSessionStore:
+    """Build the session store configured by SESSION_BACKEND"""
+    backend = backend.lower()
+
+    if backend == "memory":
+        return InMemorySessionStore()
+
+    if backend == "sqlite":
+        from modules.session_backends import SQLiteSessionStore
+
+        return SQLiteSessionStore(settings.SESSION_DB_PATH)
+
+    if backend == "redis":
+        from modules.session_backends import RedisSessionStore
+
+        return RedisSessionStore(settings.SESSION_REDIS_URL)
+
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
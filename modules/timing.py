@@ -0,0 +1,148 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+# Upper bounds (seconds) shared by every histogram
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Spans of the request being handled; None outside a traced request
+_trace: ContextVar[Optional[list]] = ContextVar("trace", default=None)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram in Prometheus' bucket layout"""
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> tuple[list[int], int, float]:
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+
+class MetricsRegistry:
+    """
+    Latency histograms keyed by (metric name, label tuple), plus gauges
+
+    Gauges are callbacks read at render time, so they always show the
+    current value (queue depth, concurrency limit) without a write path.
+    """
+
+    HELP = {
+        "eva_stage_duration_seconds": "Time spent in each chat pipeline stage",
+        "eva_request_duration_seconds": "HTTP request latency by route",
+        "eva_embedding_batch_size": "Queries per coalesced embedding request",
+        "eva_embedding_queue_wait_seconds": "Time a query waited to join a batch",
+        "eva_llm_queue_wait_seconds": "Time a chat waited for an LLM call slot",
+        "eva_llm_queue_depth": "Chats waiting for an LLM call slot",
+        "eva_llm_in_flight": "LLM calls in progress",
+        "eva_llm_concurrency_limit": "Current adaptive LLM concurrency limit",
+    }
+
+    def __init__(self):
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Register (or replace) a gauge whose value comes from `read()`"""
+        with self._lock:
+            self._gauges[name] = read
+
+    def observe(
+        self, name: str, value: float, buckets: tuple = BUCKETS, **labels: str
+    ) -> None:
+        """Record a value; `buckets` only applies when the series is created"""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        histogram.observe(value)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        # Snapshot under the lock: a first observation may add a series mid-scrape
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            gauges = sorted(self._gauges.items())
+
+        lines = []
+        by_name: dict[str, list] = {}
+        for (name, labels), histogram in histograms:
+            by_name.setdefault(name, []).append((labels, histogram))
+
+        for name, series in by_name.items():
+            lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                counts, count, total = histogram.snapshot()
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                sep = "," if label_text else ""
+                cumulative = 0
+                for bound, bucket_count in zip([*histogram.buckets, "+Inf"], counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{name}_bucket{{{label_text}{sep}le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"{name}_sum{{{label_text}}} {total:.6f}")
+                lines.append(f"{name}_count{{{label_text}}} {count}")
+
+        for name, read in gauges:
+            lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def start_trace() -> list:
+    """Begin collecting spans for the current request (context)"""
+    spans: list = []
+    _trace.set(spans)
+    return spans
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time one pipeline stage
+
+    The duration feeds the stage histogram on /metrics and, inside a traced
+    request, that request's Server-Timing header. Spans may nest (e.g.
+    history_write happens inside llm_call).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.observe("eva_stage_duration_seconds", elapsed, stage=stage)
+        spans = _trace.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def server_timing(spans: list) -> str:
+    """Render spans as a Server-Timing header value (durations in ms)"""
+    totals: dict[str, float] = {}
+    for stage, elapsed in spans:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ", ".join(
+        f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items()
+    )
@@ -0,0 +1,237 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config.settings import settings
+from modules.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Demo accounts present in every fresh directory (username, customer_id, name)
+DEMO_USERS = [
+    ("john", "CUST-001", "John Doe"),
+    ("sarah", "CUST-002", "Sarah Johnson"),
+    ("demo", "CUST-999", "Demo User"),
+]
+
+# Sequence value the first auto-created user increments from (-> CUST-004)
+INITIAL_SEQUENCE = 3
+
+
+class UserDirectory:
+    """
+    SQLite-backed username <-> customer_id directory
+
+    Lookups by username (primary key) and by customer_id (unique index) are
+    indexed and served from an in-process LRU after the first read. New
+    customer IDs come from a counter row incremented in the same IMMEDIATE
+    transaction as the insert, so concurrent first logins - from threads or
+    other workers sharing the file - never get the same ID, and IDs are
+    never reused.
+    """
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            customer_id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """,
+    ]
+
+    def __init__(
+        self,
+        db_path: str = settings.USER_DB_PATH,
+        cache_size: int = settings.USER_CACHE_SIZE,
+    ):
+        self.db_path = db_path
+        self.cache = LRUCache(cache_size)  # username -> user
+        self.customer_cache = LRUCache(cache_size)  # customer_id -> username
+        self._local = threading.local()
+        self._setup()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            # Autocommit; writes open their own IMMEDIATE transaction
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _setup(self) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            now = time.time()
+            conn.executemany(
+                "INSERT OR IGNORE INTO users VALUES (?, ?, ?, ?)",
+                [(u, cid, name, now) for u, cid, name in DEMO_USERS],
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO counters VALUES ('customer_seq', ?)",
+                (INITIAL_SEQUENCE,),
+            )
+            # Reconciled once at startup, then kept in step by get_or_create
+            conn.execute(
+                "INSERT OR REPLACE INTO counters VALUES "
+                "('users', (SELECT COUNT(*) FROM users))"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _user(row: sqlite3.Row) -> dict:
+        return {
+            "username": row["username"],
+            "customer_id": row["customer_id"],
+            "name": row["name"],
+        }
+
+    def _remember(self, user: dict) -> dict:
+        self.cache.put(user["username"], user)
+        self.customer_cache.put(user["customer_id"], user["username"])
+        return user
+
+    def get(self, username: str) -> Optional[dict]:
+        """
+        Look up a user by username
+
+        Returns:
+            dict: {"username", "customer_id", "name"} or None
+        """
+        cached = self.cache.get(username)
+        if cached is not None:
+            return cached
+
+        row = (
+            self._connect()
+            .execute(
+                "SELECT username, customer_id, name FROM users WHERE username = ?",
+                (username,),
+            )
+            .fetchone()
+        )
+        # Misses are not cached: another worker may create the user next
+        return self._remember(self._user(row)) if row else None
+
+    def get_username(self, customer_id: str) -> Optional[str]:
+        """Reverse lookup via the customer_id unique index"""
+        cached = self.customer_cache.get(customer_id)
+        if cached is not None:
+            return cached
+
+        row = (
+            self._connect()
+            .execute(
+                "SELECT username, customer_id, name FROM users WHERE customer_id = ?",
+                (customer_id,),
+            )
+            .fetchone()
+        )
+        return self._remember(self._user(row))["username"] if row else None
+
+    def get_or_create(self, username: str) -> dict:
+        """Return the user, allocating the next customer ID on first login"""
+        user = self.get(username)
+        if user is not None:
+            return user
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check inside the write lock: a concurrent login may have won
+            row = conn.execute(
+                "SELECT username, customer_id, name FROM users WHERE username = ?",
+                (username,),
+            ).fetchone()
+            if row is not None:
+                conn.execute("COMMIT")
+                return self._remember(self._user(row))
+
+            while True:
+                conn.execute(
+                    "UPDATE counters SET value = value + 1 WHERE name = 'customer_seq'"
+                )
+                sequence = conn.execute(
+                    "SELECT value FROM counters WHERE name = 'customer_seq'"
+                ).fetchone()[0]
+                customer_id = f"CUST-{sequence:03d}"
+                # Skip IDs taken by seeded accounts (e.g. CUST-999)
+                taken = conn.execute(
+                    "SELECT 1 FROM users WHERE customer_id = ?", (customer_id,)
+                ).fetchone()
+                if not taken:
+                    break
+
+            user = {
+                "username": username,
+                "customer_id": customer_id,
+                "name": username.capitalize(),
+            }
+            conn.execute(
+                "INSERT INTO users VALUES (?, ?, ?, ?)",
+                (username, customer_id, user["name"], time.time()),
+            )
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'users'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"Created new user: {username} -> {customer_id}")
+        return self._remember(user)
+
+    def count(self) -> int:
+        """Number of users (a counter row, not a table scan)"""
+        return (
+            self._connect()
+            .execute("SELECT value FROM counters WHERE name = 'users'")
+            .fetchone()[0]
+        )
+
+    def page(
+        self, prefix: str = "", limit: int = 50, after: Optional[str] = None
+    ) -> list[dict]:
+        """
+        One page of users in username order
+
+        Args:
+            prefix: Only usernames starting with this
+            limit: Page size
+            after: Cursor - the last username of the previous page
+
+        Returns:
+            list: user dicts, at most `limit`
+        """
+        # Range scans on the primary key index serve both prefix and cursor
+        lower = max(prefix, after) if after is not None else prefix
+        operator = ">" if after is not None and after >= prefix else ">="
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT username, customer_id, name FROM users "
+                f"WHERE username {operator} ? AND username < ? "
+                f"ORDER BY username LIMIT ?",
+                (lower, prefix + "\U0010ffff", limit),
+            )
+            .fetchall()
+        )
+        return [self._user(row) for row in rows]
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Waiter:
+    """
+    A thread (event) or coroutine (loop + future) queued for a slot
+
+    Slot owners keep waiters in a FIFO deque under their own lock and hand
+    slots over with grant(), so threads and coroutines share one queue and
+    a coroutine holds no thread while it waits.
+    """
+
+    __slots__ = ("event", "loop", "future", "granted", "enqueued_at")
+
+    def __init__(self, event=None, loop=None, future=None):
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+        self.enqueued_at = time.perf_counter()
+
+    @classmethod
+    def for_thread(cls) -> "Waiter":
+        return cls(event=threading.Event())
+
+    @classmethod
+    def for_coroutine(cls) -> "Waiter":
+        loop = asyncio.get_running_loop()
+        return cls(loop=loop, future=loop.create_future())
+
+    def grant(self) -> bool:
+        """
+        Wake the waiter with a slot (call with the owner's lock held)
+
+        Returns False if the waiter's event loop has closed; the slot is then
+        still free and should go to the next waiter.
+        """
+        if self.event is not None:
+            self.granted = True
+            self.event.set()
+            return True
+        try:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+        except RuntimeError:  # its event loop has closed
+            return False
+        self.granted = True
+        return True
+
+
+async def await_grant(
+    waiter: Waiter,
+    timeout: float,
+    lock: threading.Lock,
+    waiters: deque,
+    give_back: Callable[[], None],
+) -> None:
+    """
+    Wait up to `timeout` seconds for a coroutine waiter to be granted a slot
+
+    On return the caller checks `waiter.granted` under `lock` (False means a
+    timeout). If the waiting coroutine is cancelled, the waiter leaves the
+    queue, or, when a slot was granted just before the cancel, `give_back()`
+    is called with `lock` held so that slot is not lost.
+    """
+    try:
+        await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+    except asyncio.TimeoutError:
+        pass
+    except asyncio.CancelledError:
+        with lock:
+            if waiter.granted:
+                give_back()
+            else:
+                waiters.remove(waiter)
+        raise
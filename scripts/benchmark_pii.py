@@ -0,0 +1,107 @@
+"""
+Benchmark Presidio's default AnalyzerEngine against the trimmed PIIMasker engine
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import logging
+
+from presidio_analyzer import AnalyzerEngine
+
+from config.settings import settings
+from modules.pii_masker import PII_ENTITIES, build_analyzer
+
+logging.basicConfig(level=logging.WARNING)
+
+SAMPLE_MESSAGES = [
+    "hi",
+    "one latte please",
+    "What are your hours on Sunday?",
+    "My name is John Doe and I need help with my order",
+    "Call me at (987) 654-3210 or email john@example.com",
+    "Card 4111 1111 1111 1111 was charged twice, SSN 078-05-1120",
+    "Sarah Johnson wants to move her Gold Member points to IBAN GB82WEST12345698765432",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--iterations", type=int, default=50, help="passes over the sample messages"
+    )
+    parser.add_argument(
+        "--spacy-model",
+        default=settings.PII_SPACY_MODEL,
+        help="spaCy model for the trimmed engine",
+    )
+    return parser.parse_args()
+
+
+def benchmark(name: str, build, iterations: int) -> dict:
+    start = time.perf_counter()
+    analyzer = build()
+    startup = time.perf_counter() - start
+
+    # Warm-up so lazy initialisation is not billed to the first call
+    for text in SAMPLE_MESSAGES:
+        analyzer.analyze(text=text, entities=PII_ENTITIES, language="en")
+
+    timings = []
+    for _ in range(iterations):
+        for text in SAMPLE_MESSAGES:
+            start = time.perf_counter()
+            analyzer.analyze(text=text, entities=PII_ENTITIES, language="en")
+            timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        "name": name,
+        "recognizers": len(analyzer.registry.recognizers),
+        "startup_s": startup,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[int(len(timings) * 0.95)] * 1000,
+    }
+
+
+def main():
+    """Print startup and per-call latency for both engines"""
+    args = parse_args()
+
+    results = [
+        benchmark("default AnalyzerEngine()", AnalyzerEngine, args.iterations),
+        benchmark(
+            f"trimmed ({args.spacy_model})",
+            lambda: build_analyzer(args.spacy_model),
+            args.iterations,
+        ),
+    ]
+
+    print("=" * 78)
+    print(
+        f"{'engine':<32}{'recognizers':>12}{'startup':>10}"
+        f"{'mean':>8}{'p50':>8}{'p95':>8}"
+    )
+    print("-" * 78)
+    for r in results:
+        print(
+            f"{r['name']:<32}{r['recognizers']:>12}{r['startup_s']:>9.2f}s"
+            f"{r['mean_ms']:>6.1f}ms{r['p50_ms']:>6.1f}ms{r['p95_ms']:>6.1f}ms"
+        )
+    print("=" * 78)
+
+    default, trimmed = results
+    print(
+        f"Startup {default['startup_s'] / trimmed['startup_s']:.1f}x faster, "
+        f"per call {default['mean_ms'] / trimmed['mean_ms']:.1f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    main()
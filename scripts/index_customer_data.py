@@ -2,6 +2,7 @@
 Script to index customer data AND business info into ChromaDB
 """
 
+import argparse
 import os
 import sys
 
@@ -10,14 +11,56 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 import logging
 
 from config.settings import settings
-from modules.rag_retriever import rag_retriever
+from modules.rag_retriever import (
+    DOC_TYPE_BUSINESS_INFO,
+    DOC_TYPE_CUSTOMER_PROFILE,
+    get_rag_retriever,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def log_progress(stats: dict) -> None:
+    """Print indexing progress and throughput after each batch"""
+    logger.info(
+        f"  ... {stats['files']} files, {stats['chunks']} chunks, "
+        f"{stats['batches']} batches in {stats['elapsed']:.1f}s "
+        f"({stats['chunks_per_sec']:.1f} chunks/s)"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.INDEX_BATCH_SIZE,
+        help="chunks per embedding request",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.INDEX_CONCURRENCY,
+        help="embedding requests in flight at once",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="drop the vectorstore and re-embed everything "
+        "(default: only new/changed files)",
+    )
+    return parser.parse_args()
+
+
 def main():
     """Index both customer profiles and business information"""
+    args = parse_args()
+    pipeline = {
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "progress": log_progress,
+    }
     logger.info("Starting data indexing...")
 
     # Check directories exist
@@ -32,13 +75,26 @@ def main():
         logger.error(f"Business info directory not found: {business_path}")
         return
 
+    rag_retriever = get_rag_retriever()
+
     # Index customer data
     logger.info(f"Indexing customer profiles from {customer_path}...")
-    success1 = rag_retriever.index_documents(customer_path)
+    success1 = rag_retriever.index_documents(
+        customer_path,
+        append=not args.full,
+        doc_type=DOC_TYPE_CUSTOMER_PROFILE,
+        **pipeline,
+    )
+
+    # Build the customer_id -> profile lookup used instead of vector search
+    logger.info(f"Building profile index from {customer_path}...")
+    rag_retriever.profile_store.build_from_directory(customer_path)
 
     # Index business data (this will add to existing vectorstore)
     logger.info(f"Indexing business info from {business_path}...")
-    success2 = rag_retriever.index_documents(business_path)
+    success2 = rag_retriever.index_documents(
+        business_path, append=True, doc_type=DOC_TYPE_BUSINESS_INFO, **pipeline
+    )
 
     if success1 and success2:
         logger.info("✅ All data indexed successfully!")
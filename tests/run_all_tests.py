@@ -20,7 +20,20 @@ def run_test(script_name):
 if __name__ == "__main__":
     tests = [
         "test_pii_masking.py",
+        "test_session_store.py",
+        "test_session_backends.py",
+        "test_memory_window.py",
         "test_rag_retrieval.py",
+        "test_profile_store.py",
+        "test_user_store.py",
+        "test_embedding_cache.py",
+        "test_embedding_batcher.py",
+        "test_incremental_index.py",
+        "test_response_cache.py",
+        "test_timing.py",
+        "test_admission.py",
+        "test_async_pipeline.py",
+        "test_chat_endpoints.py",
         "test_conversation_memory.py",
         "test_full_integration.py",
     ]
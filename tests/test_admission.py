@@ -0,0 +1,164 @@
+"""
+Test LLM Admission Control Independently
+Run: python tests/test_admission.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.admission import AdmissionController, AdmissionRejected
+
+
+class RateLimitError(Exception):
+    """Stand-in for groq.RateLimitError"""
+
+    status_code = 429
+
+
+def test_concurrency_limit():
+    print("\n🚦 Testing Concurrency Limit (threads + async)...")
+
+    admission = AdmissionController(
+        min_limit=1, max_limit=2, initial_limit=2, max_queue=50, max_queue_wait=5
+    )
+    peak = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal peak
+        with admission.slot():
+            with lock:
+                peak = max(peak, admission.in_flight)
+            time.sleep(0.02)
+
+    async def acall():
+        nonlocal peak
+        async with admission.aslot():
+            with lock:
+                peak = max(peak, admission.in_flight)
+            await asyncio.sleep(0.02)
+
+    async def run():
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        await asyncio.gather(*(acall() for _ in range(6)))
+        for thread in threads:
+            await asyncio.to_thread(thread.join)
+
+    asyncio.run(run())
+    stats = admission.stats()
+    print(f"  Peak in flight: {peak}, stats: {stats}")
+    assert peak <= 2
+    assert stats["admitted"] == 12
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    print("  Status: ✅ Threads and coroutines share one bounded queue")
+
+
+def test_fast_rejection():
+    print("\n⛔ Testing Queue-Time-Aware Rejection...")
+
+    admission = AdmissionController(
+        min_limit=1, max_limit=1, initial_limit=1, max_queue=10, max_queue_wait=1
+    )
+    admission.latency = 3.0  # recent calls took 3s: any queueing is too slow
+
+    async def run():
+        async with admission.aslot():
+            started = time.perf_counter()
+            try:
+                await admission.aacquire()
+                raise AssertionError("second caller was admitted")
+            except AdmissionRejected as e:
+                return time.perf_counter() - started, e
+
+    elapsed, error = asyncio.run(run())
+    print(
+        f"  Rejected in {elapsed * 1000:.1f}ms: {error} (Retry-After {error.retry_after}s)"
+    )
+    assert elapsed < 0.1
+    assert error.retry_after >= 3
+    print("  Status: ✅ Hopeless waits are refused immediately with Retry-After")
+
+
+def test_aimd():
+    print("\n📉 Testing Adaptive Limit...")
+
+    admission = AdmissionController(
+        min_limit=1, max_limit=16, initial_limit=8, latency_target=1.0
+    )
+    for _ in range(40):
+        with admission.slot():
+            pass
+    grown = admission.limit
+    print(f"  After 40 fast calls: {grown:.2f}")
+    assert grown > 8
+
+    try:
+        with admission.slot():
+            raise RateLimitError("429 Too Many Requests")
+    except RateLimitError:
+        pass
+    print(f"  After a 429: {admission.limit:.2f}")
+    assert admission.limit <= grown / 2 + 0.01
+    assert admission.stats()["rate_limited"] == 1
+    print("  Status: ✅ Additive increase, multiplicative decrease on 429")
+
+
+def test_cancelled_waiters():
+    print("\n🎟️ Testing Cancelled Waiters...")
+
+    admission = AdmissionController(
+        min_limit=1, max_limit=1, initial_limit=1, max_queue=50, max_queue_wait=5
+    )
+    admission.acquire()
+
+    async def run():
+        # Cancelled while queued, and cancelled right after being granted
+        waiting = asyncio.create_task(admission.aacquire())
+        granted = asyncio.create_task(admission.aacquire())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.sleep(0)
+        admission.release(0.01)  # hands the slot to `granted`...
+        granted.cancel()  # ...which is cancelled before it resumes
+        for task in (waiting, granted):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        async with admission.aslot():
+            return admission.stats()
+
+    stats = asyncio.run(run())
+    print(f"  Stats while the next call runs: {stats}")
+    assert stats["in_flight"] == 1 and stats["queue_depth"] == 0
+    assert admission.stats()["in_flight"] == 0
+    print("  Status: ✅ A cancelled waiter never keeps or leaks a slot")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 LLM ADMISSION CONTROL TEST")
+    print("=" * 60)
+
+    try:
+        test_concurrency_limit()
+        test_fast_rejection()
+        test_aimd()
+        test_cancelled_waiters()
+
+        print("\n" + "=" * 60)
+        print("✅ All admission control tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,170 @@
+"""
+Test the Chat Endpoints Offline (fake Groq/Ollama stand-ins)
+Run: python tests/test_chat_endpoints.py
+"""
+
+import argparse
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.testclient import TestClient
+
+from benchmarks.environment import add_arguments, build_environment
+from benchmarks.fakes import DEFAULT_REPLY, FakeChatModel
+from modules import llm_handler
+from modules.llm_handler import ChatbotHandler
+from modules.response_cache import SemanticResponseCache
+
+
+class RateLimitError(Exception):
+    """Stand-in for groq.RateLimitError, with the provider's Retry-After"""
+
+    status_code = 429
+
+    def __init__(self):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": "7"})
+
+
+class RateLimitedChatModel(FakeChatModel):
+    """FakeChatModel whose every call is answered with a 429"""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise RateLimitError()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise RateLimitError()
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        raise RateLimitError()
+        yield  # makes this an async generator
+
+
+def make_client() -> TestClient:
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    build_environment(
+        parser.parse_args(
+            [
+                "--llm-latency-ms=0",
+                "--tokens-per-second=0",
+                "--embedding-latency-ms=0",
+            ]
+        )
+    )
+    import main
+
+    return TestClient(main.app)
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    """Split an SSE body into (event, data) pairs, checking the framing"""
+    events = []
+    assert body.endswith("\n\n")
+    for frame in body.strip("\n").split("\n\n"):
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        event, data = event_line[len("event: ") :], data_line[len("data: ") :]
+        events.append((event, json.loads(data)))
+    return events
+
+
+def test_sse_stream(client):
+    print("\n🌊 Testing /chat/stream Framing...")
+
+    response = client.post(
+        "/chat/stream", json={"username": "john", "message": "Any pastries today?"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    print(f"  Events: {names[0]}, {names.count('token')} x token, {names[-1]}")
+    assert names[0] == "meta" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+
+    meta = events[0][1]
+    assert meta["username"] == "john" and meta["customer_id"] == "CUST-001"
+    tokens = "".join(data["content"] for name, data in events if name == "token")
+    assert tokens == events[-1][1]["response"] == DEFAULT_REPLY
+    print("  Status: ✅ meta, tokens and done arrive as well-formed SSE frames")
+
+
+def test_saturated_stream(client):
+    print("\n⛔ Testing /chat/stream When the LLM Is Saturated...")
+
+    admission = llm_handler.get_chatbot().admission
+    max_queue = admission.max_queue
+    held = int(admission.limit)
+    for _ in range(held):
+        admission.acquire()
+    admission.max_queue = 0
+    try:
+        response = client.post(
+            "/chat/stream", json={"username": "john", "message": "Any pastries?"}
+        )
+    finally:
+        admission.max_queue = max_queue
+        for _ in range(held):
+            admission.release(0.01)
+
+    retry_after = response.headers.get("retry-after")
+    print(f"  Status {response.status_code}, Retry-After {retry_after}")
+    assert response.status_code == 503
+    assert int(retry_after) >= 1
+    assert "event:" not in response.text
+    print("  Status: ✅ Rejected before the stream starts, with a plain 503")
+
+
+def test_rate_limited(client):
+    print("\n🚦 Testing Provider 429 -> 503...")
+
+    healthy = llm_handler.get_chatbot()
+    limited = ChatbotHandler(chat_model=RateLimitedChatModel())
+    limited.response_cache = SemanticResponseCache(maxsize=0)
+    llm_handler._chatbot.set(limited)
+    try:
+        for path in ["/chat", "/chat/stream"]:
+            response = client.post(
+                path, json={"username": "john", "message": "What are your hours?"}
+            )
+            print(
+                f"  {path}: {response.status_code}, "
+                f"Retry-After {response.headers.get('retry-after')}"
+            )
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "7"
+    finally:
+        llm_handler._chatbot.set(healthy)
+
+    stats = limited.admission.stats()
+    assert stats["rate_limited"] == 2 and stats["in_flight"] == 0
+    print("  Status: ✅ A 429 asks the client to back off instead of failing")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 CHAT ENDPOINTS TEST")
+    print("=" * 60)
+
+    try:
+        client = make_client()
+        test_sse_stream(client)
+        test_saturated_stream(client)
+        test_rate_limited(client)
+
+        print("\n" + "=" * 60)
+        print("✅ All chat endpoint tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
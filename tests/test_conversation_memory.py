@@ -112,7 +112,7 @@ def test_memory_limit():
 
     session_id = "test-limit"
 
-    print(f"  Memory length set to: {settings.MEMORY_LENGTH} messages")
+    print(f"  Memory length set to: {settings.MEMORY_LENGTH} turns")
 
     # Send more messages than memory limit
     for i in range(settings.MEMORY_LENGTH + 3):
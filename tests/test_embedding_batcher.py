@@ -0,0 +1,116 @@
+"""
+Test Query Embedding Coalescing Independently
+Run: python tests/test_embedding_batcher.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from modules.embedding_batcher import EmbeddingCoalescer
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    """Fake embedding model with a round trip delay that records batch sizes"""
+
+    batches: list = []
+    fail: bool = False
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(len(texts))
+        time.sleep(0.02)
+        if self.fail:
+            raise ConnectionError("ollama unavailable")
+        return super().embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(len(texts))
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise ConnectionError("ollama unavailable")
+        return super().embed_documents(texts)
+
+
+QUERIES = [f"question number {i}" for i in range(24)]
+
+
+def test_async_coalescing():
+    print("\n⚡ Testing Async Coalescing...")
+
+    upstream = SlowEmbeddings(size=8, batches=[])
+    coalescer = EmbeddingCoalescer(upstream, max_wait=0.01, max_batch=8)
+
+    async def run():
+        return await asyncio.gather(*(coalescer.aembed_query(q) for q in QUERIES))
+
+    vectors = asyncio.run(run())
+    print(f"  Upstream batches: {upstream.batches}")
+    print(f"  Stats: {coalescer.stats()}")
+    assert vectors == [upstream.embed_query(q) for q in QUERIES]
+    assert len(upstream.batches) <= 4
+    assert max(upstream.batches) <= 8
+    print("  Status: ✅ 24 queries sent in a few batches, each caller got its vector")
+
+
+def test_thread_coalescing():
+    print("\n🧵 Testing Thread Coalescing...")
+
+    upstream = SlowEmbeddings(size=8, batches=[])
+    coalescer = EmbeddingCoalescer(upstream, max_wait=0.01, max_batch=8)
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        vectors = list(pool.map(coalescer.embed_query, QUERIES))
+
+    print(f"  Upstream batches: {upstream.batches}")
+    assert vectors == [upstream.embed_query(q) for q in QUERIES]
+    assert coalescer.stats()["batches"] < len(QUERIES)
+    print("  Status: ✅ Concurrent threads share upstream requests")
+
+
+def test_idle_and_errors():
+    print("\n🚦 Testing Idle Fast Path and Errors...")
+
+    upstream = SlowEmbeddings(size=8, batches=[])
+    coalescer = EmbeddingCoalescer(upstream, max_wait=0.5, max_batch=8)
+
+    started = time.perf_counter()
+    coalescer.embed_query("hello")
+    elapsed = time.perf_counter() - started
+    print(f"  Lone query took {elapsed * 1000:.1f}ms (max_wait 500ms)")
+    assert elapsed < 0.25
+
+    upstream.fail = True
+    try:
+        asyncio.run(coalescer.aembed_query("hello again"))
+        raise AssertionError("upstream error was swallowed")
+    except ConnectionError:
+        pass
+    assert coalescer.in_flight == 0
+    print("  Status: ✅ No wait when idle, upstream errors reach every caller")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 EMBEDDING COALESCING FEATURE TEST")
+    print("=" * 60)
+
+    try:
+        test_async_coalescing()
+        test_thread_coalescing()
+        test_idle_and_errors()
+
+        print("\n" + "=" * 60)
+        print("✅ All embedding coalescing tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,86 @@
+"""
+Test Query Embedding Cache Independently
+Run: python tests/test_embedding_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from modules.embedding_cache import CachedQueryEmbeddings
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embedding model that counts upstream calls"""
+
+    calls: int = 0
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def test_memory_cache():
+    print("\n⚡ Testing In-Memory Query Cache...")
+
+    upstream = CountingEmbeddings(size=16)
+    cached = CachedQueryEmbeddings(upstream, model_name="fake", disk_path=None)
+
+    queries = ["What are your hours?", "what are your   hours", "My usual", "my usual!"]
+    for query in queries:
+        cached.embed_query(query)
+    asyncio.run(cached.aembed_query("WHAT ARE YOUR HOURS"))
+
+    stats = cached.stats()
+    print(f"  Upstream calls: {upstream.calls}, stats: {stats}")
+    assert upstream.calls == 2
+    assert stats["memory_hits"] == 3
+    print("  Status: ✅ Repeated (normalized) questions skip the model")
+
+
+def test_disk_cache():
+    print("\n💽 Testing On-Disk Query Cache...")
+
+    path = os.path.join(tempfile.mkdtemp(), "embeddings.db")
+    first = CachedQueryEmbeddings(CountingEmbeddings(size=16), "fake", disk_path=path)
+    vector = first.embed_query("do you have oat milk")
+
+    upstream = CountingEmbeddings(size=16)
+    restarted = CachedQueryEmbeddings(upstream, "fake", disk_path=path)
+    again = restarted.embed_query("Do you have oat milk?")
+
+    other_model = CachedQueryEmbeddings(
+        CountingEmbeddings(size=16), "other", disk_path=path
+    )
+    other_model.embed_query("do you have oat milk")
+
+    print(f"  Disk hits after restart: {restarted.stats()['disk_hits']}")
+    assert upstream.calls == 0
+    assert max(abs(a - b) for a, b in zip(vector, again)) < 1e-6
+    assert other_model.stats()["disk_hits"] == 0
+    print("  Status: ✅ Vectors survive restarts and are keyed by model")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 EMBEDDING CACHE FEATURE TEST")
+    print("=" * 60)
+
+    try:
+        test_memory_cache()
+        test_disk_cache()
+
+        print("\n" + "=" * 60)
+        print("✅ All embedding cache tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
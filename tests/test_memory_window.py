@@ -0,0 +1,212 @@
+"""
+Test Conversation Memory Window + Summaries Independently
+Run: python tests/test_memory_window.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from modules.memory import SUMMARY_PREFIX, ConversationMemory
+from modules.session_store import SessionHistory
+
+
+def make_history(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"Message number {i}"))
+        messages.append(AIMessage(content=f"Got message {i}"))
+    return messages
+
+
+def test_turn_window():
+    print("\n🪟 Testing Turn Window...")
+
+    memory = ConversationMemory(max_turns=3, max_tokens=10_000, summarize=False)
+    trimmed = memory.trim(make_history(10))
+
+    print(f"  Kept: {[m.content for m in trimmed]}")
+    assert len(trimmed) == 6
+    assert trimmed[0].content == "Message number 7"
+    print("  Status: ✅ Only the last 3 turns reach the prompt")
+
+
+def test_token_budget():
+    print("\n🔢 Testing Token Budget...")
+
+    memory = ConversationMemory(max_turns=50, max_tokens=60, summarize=False)
+    history = make_history(20)
+    trimmed = memory.trim(history)
+
+    print(f"  Kept {len(trimmed)} of {len(history)} messages")
+    assert 0 < len(trimmed) < len(history)
+    assert isinstance(trimmed[0], HumanMessage)
+    print("  Status: ✅ Prompt history stays under the token budget")
+
+
+def test_rolling_summary():
+    print("\n📝 Testing Rolling Summary...")
+
+    llm = FakeListChatModel(responses=["Customer sent numbered messages 0-6."])
+    memory = ConversationMemory(llm=llm, max_turns=3, max_tokens=10_000, summarize=True)
+
+    history = SessionHistory()
+    history.add_messages(make_history(10))
+    compacted = memory.compact(history)
+
+    messages = history.messages
+    print(f"  Summary: {messages[0].content}")
+    assert compacted
+    assert isinstance(messages[0], SystemMessage)
+    assert messages[0].content.startswith(SUMMARY_PREFIX)
+    assert len(messages) == 7
+
+    trimmed = memory.trim(messages)
+    assert trimmed[0] is messages[0]
+    print("  Status: ✅ Old turns folded into a summary kept at the head")
+
+
+class ScriptedSummarizer:
+    """Summary model that runs a side effect (a concurrent write) per call"""
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+
+    def invoke(self, messages):
+        text, side_effect = self.steps.pop(0)
+        if side_effect:
+            side_effect()
+        return AIMessage(content=text)
+
+
+def turn(i: int) -> list:
+    return [HumanMessage(content=f"q{i}"), AIMessage(content=f"a{i}")]
+
+
+def test_overlapping_compaction():
+    print("\n🔀 Testing Overlapping Compactions...")
+
+    history = SessionHistory()
+    for i in range(8):
+        history.add_messages(turn(i))
+
+    finished = []
+
+    def second_compaction():
+        # Turn 8 lands and a newer compaction finishes while the first waits
+        history.add_messages(turn(8))
+        finished.append(memory.compact(history))
+
+    llm = ScriptedSummarizer([("s1", second_compaction), ("s2", None)])
+    memory = ConversationMemory(
+        llm=llm, max_turns=3, max_tokens=10_000, summarize=True, compact_threshold=1
+    )
+    first = memory.compact(history)
+    history.add_messages(turn(9))
+
+    contents = [m.content for m in history.messages]
+    print(f"  History: {contents}")
+    assert finished == [True] and not first
+    assert contents[0] == SUMMARY_PREFIX + "s2"
+    assert contents[-4:] == ["q8", "a8", "q9", "a9"]
+
+    # A session cleared mid-summary stays cleared
+    memory.llm = ScriptedSummarizer([("s3", history.clear)])
+    for i in range(10, 15):
+        history.add_messages(turn(i))
+    assert not memory.compact(history)
+    assert history.messages == []
+    print("  Status: ✅ Stale summaries are dropped instead of losing turns")
+
+
+def test_compact_threshold():
+    print("\n📏 Testing Compaction Threshold...")
+
+    llm = FakeListChatModel(responses=["summary"])
+    memory = ConversationMemory(
+        llm=llm, max_turns=3, max_tokens=10_000, summarize=True, compact_threshold=2
+    )
+    history = SessionHistory()
+    history.add_messages(make_history(4))
+    assert not memory.compact(history)  # one turn outside the window
+    history.add_messages(make_history(1))
+    assert memory.compact(history)  # two turns outside the window
+    print("  Status: ✅ Summaries wait until enough turns overflow")
+
+
+class ThreadRecordingHistory(BaseChatMessageHistory):
+    """In-memory history that notes which threads read and rewrite it"""
+
+    def __init__(self, messages: list):
+        self._messages = list(messages)
+        self.threads = set()
+
+    @property
+    def messages(self) -> list:
+        self.threads.add(threading.get_ident())
+        return list(self._messages)
+
+    def add_messages(self, messages) -> None:
+        self._messages.extend(messages)
+
+    def clear(self) -> None:
+        self._messages = []
+
+    def replace_messages(self, messages) -> bool:
+        self.threads.add(threading.get_ident())
+        self._messages = list(messages)
+        return True
+
+
+def test_async_compaction_off_loop():
+    print("\n🧵 Testing Async Compaction Storage Calls...")
+
+    llm = FakeListChatModel(responses=["summary"])
+    memory = ConversationMemory(llm=llm, max_turns=3, max_tokens=10_000, summarize=True)
+    history = ThreadRecordingHistory(make_history(10))
+
+    async def run():
+        loop_thread = threading.get_ident()
+        compacted = await memory.acompact(history)
+        return loop_thread, compacted
+
+    loop_thread, compacted = asyncio.run(run())
+    threads = set(history.threads)
+    print(
+        f"  Compacted: {compacted}, history touched from {len(history.threads)} thread(s)"
+    )
+    assert compacted
+    assert history.messages[0].content == SUMMARY_PREFIX + "summary"
+    assert threads and loop_thread not in threads
+    print("  Status: ✅ History reads and rewrites never run on the event loop")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 MEMORY WINDOW FEATURE TEST")
+    print("=" * 60)
+
+    try:
+        test_turn_window()
+        test_token_budget()
+        test_rolling_summary()
+        test_overlapping_compaction()
+        test_compact_threshold()
+        test_async_compaction_off_loop()
+
+        print("\n" + "=" * 60)
+        print("✅ All memory window tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
@@ -8,7 +8,7 @@ import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from modules.pii_masker import pii_masker
+from modules.pii_masker import SlotSemaphore, pii_masker, prescreen
 
 
 def test_phone_masking():
@@ -73,6 +73,111 @@ def test_no_pii():
     print(f"  PII Found: {'❌ (Expected)' if not detected else '❌ (Unexpected!)'}\n")
 
 
+def test_prescreen_fast_path():
+    print("\n⚡ Testing Pre-Screen Fast Path...")
+    clean = ["hi", "one latte please", "What are your hours? Thanks!"]
+    risky = [
+        "My phone is 9876543210",
+        "Email me at john@example.com",
+        "Sarah Johnson placed an order",
+        "Élodie ordered a latte",
+        "thanks, Ólafur will pick it up",
+        "Will called yesterday about the order",
+        "my name is john",
+        "Hi, I'm John Doe, phone: 9876543210, email: john@test.com",
+    ]
+
+    for text in clean + risky:
+        print(f"  {text!r}: {prescreen(text) or 'clean - NER skipped'}")
+    assert all(prescreen(text) is None for text in clean)
+    assert all(prescreen(text) is not None for text in risky)
+
+    for text in clean:
+        masked, detected = pii_masker.mask_pii(text)
+        assert masked == text and not detected
+    print(f"  Stats: {pii_masker.stats()}\n")
+
+
+def test_mask_many():
+    print("\n📦 Testing Batch Masking...")
+    texts = [
+        "one latte please",
+        "My phone is 9876543210",
+        "Email me at john@example.com",
+        "What are your hours?",
+    ]
+
+    results = pii_masker.mask_many(texts, batch_size=2)
+    for text, (masked, detected) in zip(texts, results):
+        print(f"  {text!r} -> {masked!r} ({'PII' if detected else 'clean'})")
+    assert len(results) == len(texts)
+    assert results == [pii_masker.mask_pii(text) for text in texts]
+    print("  Status: ✅ Same results as mask_pii, in input order\n")
+
+
+def test_process_pool():
+    print("\n🧵 Testing Process-Pool Mode...")
+    import asyncio
+
+    from modules.pii_masker import PIIMasker
+
+    texts = [
+        "one latte please",
+        "My phone is 9876543210",
+        "Email me at john@example.com",
+    ]
+    pooled = PIIMasker(workers=2)
+    try:
+        results = [pooled.mask_pii(text) for text in texts]
+
+        async def mask_concurrently():
+            return await asyncio.gather(*(pooled.amask_pii(t) for t in texts * 4))
+
+        async_results = asyncio.run(mask_concurrently())
+    finally:
+        pooled.close()
+    stats = pooled.stats()["process_pool"]
+
+    print(f"  Pool stats: {stats}")
+    assert results == [pii_masker.mask_pii(text) for text in texts]
+    assert async_results == results * 4
+    assert stats["submitted"] == 10  # the clean message never leaves the process
+    assert stats["in_flight"] == 0
+    print("  Status: ✅ Worker processes mask exactly like the in-process engine\n")
+
+
+def test_slot_cancellation():
+    print("\n🎟️ Testing Pool Slots Under Cancellation...")
+    import asyncio
+    import threading
+
+    slots = SlotSemaphore(1)
+    assert slots.acquire(timeout=0)
+    threads_before = threading.active_count()
+
+    async def run():
+        # Cancelled while waiting, and cancelled right after being granted
+        waiting = asyncio.create_task(slots.aacquire(5))
+        granted = asyncio.create_task(slots.aacquire(5))
+        await asyncio.sleep(0.01)
+        assert slots.waiting == 2
+        assert threading.active_count() == threads_before
+        waiting.cancel()
+        await asyncio.sleep(0)
+        slots.release()  # hands the slot to `granted`...
+        granted.cancel()  # ...which is cancelled before it resumes
+        for task in (waiting, granted):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        return await slots.aacquire(0.1)
+
+    assert asyncio.run(run())
+    assert slots.waiting == 0
+    print("  Status: ✅ Cancelled waiters never leak a slot or hold a thread\n")
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("🧪 PII MASKING FEATURE TEST")
@@ -84,6 +189,10 @@ if __name__ == "__main__":
         test_person_name_masking()
         test_mixed_pii()
         test_no_pii()
+        test_prescreen_fast_path()
+        test_mask_many()
+        test_process_pool()
+        test_slot_cancellation()
 
         print("=" * 60)
         print("✅ All PII masking tests completed!")
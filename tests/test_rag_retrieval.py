@@ -9,7 +9,7 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from config.settings import settings
-from modules.rag_retriever import rag_retriever
+from modules.rag_retriever import needs_business_lookup, rag_retriever
 
 
 def test_context_retrieval():
@@ -97,6 +97,19 @@ def test_no_match():
         )
 
 
+def test_small_talk_skip():
+    print("\n💬 Testing Small-Talk Detection...")
+
+    small_talk = ["thanks!", "ok cool", "Thank you so much EVA"]
+    questions = ["What are your hours?", "hi, do you have oat milk?"]
+
+    for query in small_talk + questions:
+        lookup = needs_business_lookup(query)
+        print(f"  '{query}': {'business lookup' if lookup else 'skipped'}")
+    assert not any(needs_business_lookup(query) for query in small_talk)
+    assert all(needs_business_lookup(query) for query in questions)
+
+
 def check_indexed_data():
     print("\n📊 Checking Indexed Data...")
 
@@ -124,6 +137,7 @@ if __name__ == "__main__":
     print("=" * 60)
 
     try:
+        test_small_talk_skip()
         if check_indexed_data():
             test_context_retrieval()
             test_semantic_search()
@@ -0,0 +1,95 @@
+"""
+Test Semantic Response Cache Independently
+Run: python tests/test_response_cache.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.response_cache import SemanticResponseCache
+
+
+def test_similarity_lookup():
+    print("\n🎯 Testing Similarity Lookup...")
+
+    cache = SemanticResponseCache(maxsize=8, ttl_seconds=None, threshold=0.95)
+    cache.put([1.0, 0.0, 0.0], "store hours?", "We open at 7am.", version="v1")
+
+    near = cache.get([0.99, 0.05, 0.0], version="v1")
+    far = cache.get([0.0, 1.0, 0.0], version="v1")
+    print(f"  Near question: {near!r}, unrelated question: {far!r}")
+    assert near == "We open at 7am."
+    assert far is None
+    print("  Status: ✅ Only near-duplicate questions are served from cache")
+
+
+def test_eviction_and_ttl():
+    print("\n⏳ Testing Size Bound and TTL...")
+
+    cache = SemanticResponseCache(maxsize=2, ttl_seconds=0.05, threshold=0.95)
+    cache.put([1.0, 0.0, 0.0], "a", "A")
+    cache.put([0.0, 1.0, 0.0], "b", "B")
+    cache.put([0.0, 0.0, 1.0], "c", "C")
+    print(f"  Size after 3 puts: {len(cache)}")
+    assert len(cache) == 2
+    assert cache.get([1.0, 0.0, 0.0]) is None
+    assert cache.get([0.0, 0.0, 1.0]) == "C"
+
+    time.sleep(0.1)
+    assert cache.get([0.0, 0.0, 1.0]) is None
+    print(f"  Stats: {cache.stats()}")
+    print("  Status: ✅ Oldest entries evicted and stale answers expire")
+
+
+def test_version_invalidation():
+    print("\n🔄 Testing Re-Index Invalidation...")
+
+    cache = SemanticResponseCache(maxsize=8, ttl_seconds=None, threshold=0.95)
+    cache.put([1.0, 0.0], "menu?", "Lattes and cold brew.", version="v1")
+    assert cache.get([1.0, 0.0], version="v1") is not None
+
+    result = cache.get([1.0, 0.0], version="v2")
+    print(f"  Lookup after business info changed: {result!r}")
+    assert result is None
+    assert cache.stats()["invalidations"] == 1
+    print("  Status: ✅ New index version drops cached answers")
+
+
+def test_conversation_context():
+    print("\n💬 Testing Follow-Up Isolation...")
+
+    cache = SemanticResponseCache(maxsize=8, ttl_seconds=None, threshold=0.95)
+    # "How much does it cost?" after asking about the pumpkin latte
+    cache.put([1.0, 0.0], "How much does it cost?", "The latte is $5.", context="latte")
+
+    other = cache.get([1.0, 0.0], context="muffins")
+    same = cache.get([1.0, 0.0], context="latte")
+    print(f"  After other turns: {other!r}, after the same turns: {same!r}")
+    assert other is None
+    assert same == "The latte is $5."
+    print("  Status: ✅ Same follow-up with different prior turns is a miss")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 RESPONSE CACHE FEATURE TEST")
+    print("=" * 60)
+
+    try:
+        test_similarity_lookup()
+        test_eviction_and_ttl()
+        test_version_invalidation()
+        test_conversation_context()
+
+        print("\n" + "=" * 60)
+        print("✅ All response cache tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
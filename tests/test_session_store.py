@@ -0,0 +1,131 @@
+"""
+Test Session Store Eviction Independently
+Run: python tests/test_session_store.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from modules.session_store import InMemorySessionStore
+
+
+def test_lru_eviction():
+    print("\n📦 Testing LRU Eviction...")
+
+    store = InMemorySessionStore(
+        max_sessions=2, ttl_seconds=3600, max_memory_bytes=10**9
+    )
+    store.get_or_create("CUST-001:default")
+    store.get_or_create("CUST-002:default")
+    store.get_or_create("CUST-001:default")  # refresh -> CUST-002 is now LRU
+    store.get_or_create("CUST-003:default")
+
+    print(f"  Sessions: {[sid for sid, _ in store.items()]}")
+    assert "CUST-002:default" not in store
+    assert "CUST-001:default" in store
+    assert store.stats()["evicted_lru"] == 1
+    print("  Status: ✅ Least recently used session evicted")
+
+
+def test_ttl_eviction():
+    print("\n⏱️  Testing Idle TTL Eviction...")
+
+    store = InMemorySessionStore(
+        max_sessions=100, ttl_seconds=0.1, max_memory_bytes=10**9
+    )
+    store.get_or_create("CUST-001:default")
+    time.sleep(0.2)
+
+    assert len(store) == 0
+    assert store.stats()["evicted_ttl"] == 1
+    print("  Status: ✅ Idle session expired")
+
+
+def test_memory_cap():
+    print("\n🧠 Testing Memory Cap...")
+
+    store = InMemorySessionStore(
+        max_sessions=100, ttl_seconds=3600, max_memory_bytes=4096
+    )
+    first = store.get_or_create("CUST-001:default")
+    first.add_message(HumanMessage(content="x" * 2000))
+
+    second = store.get_or_create("CUST-002:default")
+    second.add_messages(
+        [HumanMessage(content="y" * 1000), AIMessage(content="z" * 1000)]
+    )
+
+    stats = store.stats()
+    print(f"  Approx memory: {stats['approx_memory_bytes']} bytes")
+    assert "CUST-001:default" not in store
+    assert stats["evicted_memory"] == 1
+    assert stats["approx_memory_bytes"] <= 4096
+    print("  Status: ✅ Oldest session evicted to stay under the cap")
+
+
+def test_delete():
+    print("\n🗑️  Testing Delete...")
+
+    store = InMemorySessionStore()
+    history = store.get_or_create("CUST-001:default")
+    history.add_message(HumanMessage(content="I love iced coffee"))
+
+    assert store.delete("CUST-001:default")
+    assert not store.delete("CUST-001:default")
+    assert store.stats()["approx_memory_bytes"] == 0
+    print("  Status: ✅ Session removed and memory released")
+
+
+def test_write_path_counters():
+    print("\n🔢 Testing Write-Path Analytics Counters...")
+
+    store = InMemorySessionStore(
+        max_sessions=2, ttl_seconds=3600, max_memory_bytes=10**9
+    )
+    store.get_or_create("CUST-001:default").add_messages(
+        [HumanMessage(content="Hi"), AIMessage(content="Hello!")]
+    )
+    store.get_or_create("CUST-001:other").add_message(HumanMessage(content="Hey"))
+    store.get_or_create("CUST-002:default").add_message(HumanMessage(content="Yo"))
+
+    # Third session evicted CUST-001:default (LRU), taking its 2 messages along
+    counts = store.counters.snapshot()
+    print(f"  After eviction: {counts}")
+    assert counts == {
+        "total_messages": 2,
+        "messages_per_customer": {"CUST-001": 1, "CUST-002": 1},
+    }
+
+    store.get_or_create("CUST-002:default").clear()
+    store.delete("CUST-001:other")
+    counts = store.counters.snapshot()
+    assert counts == {"total_messages": 0, "messages_per_customer": {}}
+    print("  Status: ✅ Counters follow writes, clears, deletes and evictions")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 SESSION STORE FEATURE TEST")
+    print("=" * 60)
+
+    try:
+        test_lru_eviction()
+        test_ttl_eviction()
+        test_memory_cap()
+        test_delete()
+        test_write_path_counters()
+
+        print("\n" + "=" * 60)
+        print("✅ All session store tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
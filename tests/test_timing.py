@@ -0,0 +1,87 @@
+"""
+Test Latency Instrumentation Independently
+Run: python tests/test_timing.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.timing import MetricsRegistry, metrics, server_timing, span, start_trace
+
+
+def test_spans_feed_trace():
+    print("\n⏱️ Testing Request Trace...")
+
+    spans = start_trace()
+    with span("validation"):
+        pass
+    with span("llm_call"):
+        time.sleep(0.01)
+    with span("prompt_build"):
+        pass
+    with span("prompt_build"):
+        pass
+
+    header = server_timing(spans)
+    print(f"  Server-Timing: {header}")
+    assert [stage for stage, _ in spans] == [
+        "validation",
+        "llm_call",
+        "prompt_build",
+        "prompt_build",
+    ]
+    assert header.count("prompt_build") == 1
+    assert "llm_call;dur=" in header
+    print("  Status: ✅ Stages recorded in order, repeats summed in the header")
+
+
+def test_prometheus_render():
+    print("\n📈 Testing Prometheus Exposition...")
+
+    registry = MetricsRegistry()
+    registry.observe("eva_stage_duration_seconds", 0.003, stage="embedding")
+    registry.observe("eva_stage_duration_seconds", 0.2, stage="embedding")
+    registry.observe("eva_stage_duration_seconds", 30.0, stage="embedding")
+
+    text = registry.render()
+    print("  " + "\n  ".join(text.splitlines()[:4]))
+    assert "# TYPE eva_stage_duration_seconds histogram" in text
+    assert 'eva_stage_duration_seconds_bucket{stage="embedding",le="0.005"} 1' in text
+    assert 'eva_stage_duration_seconds_bucket{stage="embedding",le="0.25"} 2' in text
+    assert 'eva_stage_duration_seconds_bucket{stage="embedding",le="+Inf"} 3' in text
+    assert 'eva_stage_duration_seconds_count{stage="embedding"} 3' in text
+    print("  Status: ✅ Cumulative buckets, sum and count per label set")
+
+
+def test_global_registry():
+    print("\n🌐 Testing Shared Registry...")
+
+    with span("history_write"):
+        pass
+    text = metrics.render()
+    assert 'eva_stage_duration_seconds_count{stage="history_write"}' in text
+    print("  Status: ✅ Spans outside a request still reach /metrics")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 LATENCY INSTRUMENTATION TEST")
+    print("=" * 60)
+
+    try:
+        test_spans_feed_trace()
+        test_prometheus_render()
+        test_global_registry()
+
+        print("\n" + "=" * 60)
+        print("✅ All timing tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,138 @@
+"""
+Test Persistent User Directory Independently
+Run: python tests/test_user_store.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from modules.user_store import UserDirectory
+
+
+def test_seed_and_persistence(db_path):
+    print("\n💾 Testing Seeds and Persistence...")
+
+    directory = UserDirectory(db_path=db_path)
+    john = directory.get("john")
+    print(f"  john: {john}")
+    assert john["customer_id"] == "CUST-001"
+    assert directory.get("nobody") is None
+
+    alice = directory.get_or_create("alice")
+    print(f"  alice: {alice}")
+    assert alice["customer_id"] == "CUST-004"
+
+    reopened = UserDirectory(db_path=db_path)
+    assert reopened.get("alice") == alice
+    assert reopened.get_username("CUST-004") == "alice"
+    assert reopened.count() == 4
+    print("  Status: ✅ Users and IDs survive a restart")
+
+
+def test_concurrent_allocation(db_path):
+    print("\n🔒 Testing Concurrent First Logins...")
+
+    directory = UserDirectory(db_path=db_path)
+    other_worker = UserDirectory(db_path=db_path)  # same file, separate cache
+    results = []
+    lock = threading.Lock()
+
+    def login(store, username):
+        user = store.get_or_create(username)
+        with lock:
+            results.append((username, user["customer_id"]))
+
+    threads = [
+        threading.Thread(
+            target=login, args=(directory if i % 2 else other_worker, f"user{i:03d}")
+        )
+        for i in range(40)
+    ]
+    # The same new username from many threads at once
+    threads += [
+        threading.Thread(target=login, args=(directory, "racer")) for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = {username: cid for username, cid in results if username != "racer"}
+    racer_ids = {cid for username, cid in results if username == "racer"}
+    print(f"  {len(ids)} new users, racer got {racer_ids}")
+    assert len(set(ids.values())) == 40
+    assert len(racer_ids) == 1
+    assert not racer_ids & set(ids.values())
+    assert directory.count() == 3 + 40 + 1
+    print("  Status: ✅ Every new user got a unique ID, exactly once")
+
+
+def test_skips_taken_ids(db_path):
+    print("\n⏭️ Testing Seeded ID Collision...")
+
+    directory = UserDirectory(db_path=db_path)
+    # Move the sequence up to just below the seeded demo account
+    conn = directory._connect()
+    conn.execute("UPDATE counters SET value = 998 WHERE name = 'customer_seq'")
+
+    first = directory.get_or_create("before_demo")
+    second = directory.get_or_create("after_demo")
+    print(f"  {first['customer_id']}, {second['customer_id']}")
+    assert first["customer_id"] == "CUST-1000"
+    assert second["customer_id"] == "CUST-1001"
+    print("  Status: ✅ CUST-999 (demo) is never handed out again")
+
+
+def test_pagination(db_path):
+    print("\n📄 Testing Prefix Search and Pagination...")
+
+    directory = UserDirectory(db_path=db_path)
+    for name in ["sam", "samantha", "sandra", "sebastian", "zoe"]:
+        directory.get_or_create(name)
+
+    matches = [u["username"] for u in directory.page(prefix="sa")]
+    print(f"  prefix 'sa': {matches}")
+    assert matches == ["sam", "samantha", "sandra", "sarah"]
+
+    pages, after = [], None
+    while True:
+        page = directory.page(limit=3, after=after)
+        if not page:
+            break
+        pages.append([u["username"] for u in page])
+        after = page[-1]["username"]
+    print(f"  pages of 3: {pages}")
+    flattened = [name for page in pages for name in page]
+    assert flattened == sorted(flattened)
+    assert len(flattened) == directory.count()
+
+    page = directory.page(prefix="sa", limit=2, after="samantha")
+    assert [u["username"] for u in page] == ["sandra", "sarah"]
+    print("  Status: ✅ Index range scans serve prefix and cursor queries")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("🧪 USER DIRECTORY FEATURE TEST")
+    print("=" * 60)
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            test_seed_and_persistence(os.path.join(tmp, "persist.db"))
+            test_concurrent_allocation(os.path.join(tmp, "concurrent.db"))
+            test_skips_taken_ids(os.path.join(tmp, "collision.db"))
+            test_pagination(os.path.join(tmp, "pages.db"))
+
+        print("\n" + "=" * 60)
+        print("✅ All user directory tests completed!")
+        print("=" * 60)
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+
+        traceback.print_exc()
+        sys.exit(1)